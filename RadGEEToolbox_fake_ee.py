@@ -0,0 +1,978 @@
+import datetime
+import hashlib
+import inspect
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+
+# Offline stand-in for the subset of the Earth Engine Python API used by RadGEEToolbox and the apps, for benchmarking
+# and counting round trips without an Earth Engine account. Expressions are built lazily like the real client library
+# (functions passed to map are traced once with a variable), so graph sizes are comparable, and are evaluated locally
+# by a small interpreter when getInfo/getMapId/getThumbURL is called - the only "remote" calls. Images are modelled
+# as a single value per band over a synthetic Landsat 5/8/9 and Sentinel-2 catalog of the app regions' tiles, so
+# results are plausible but not real data.
+#
+#   import RadGEEToolbox_fake_ee
+#   backend = RadGEEToolbox_fake_ee.install(latency=0.3)  # `import ee` now gives this module
+#   ...
+#   backend.calls  # one dict per remote call: kind, site, nodes, latency
+#
+# Record/replay: with mode='record' every remote result is stored in backend.recording (a Recording, saved as JSON),
+# keyed by call site (file:function outside the toolbox's get_info), kind and ordinal; mode='replay' serves results
+# from a recording instead of interpreting, so a session recorded against live Earth Engine (see record_live) can be
+# replayed offline. Concurrent calls from the same call site may replay in a different order than recorded
+
+_HERE = os.path.abspath(__file__)
+
+class ComputedObject:
+    def __init__(self, func, args=(), kwargs=None):
+        self.func = func
+        self.args = tuple(args)
+        self.kwargs = dict(kwargs or {})
+
+    def __getattr__(self, name):
+        # Any other attribute is an API method: calling it builds a new node with this object as the receiver
+        if name.startswith('_'):
+            raise AttributeError(name)
+        def method(*args, **kwargs):
+            return ComputedObject('.' + name, (self,) + tuple(_function(arg) for arg in args), {key: _function(value) for key, value in kwargs.items()})
+        return method
+
+    def getInfo(self):
+        return backend.remote('getInfo', self)
+
+    def getMapId(self, vis_params=None):
+        return backend.remote('getMapId', self, vis_params or {})
+
+    def getThumbURL(self, params=None):
+        return backend.remote('getThumbURL', self, params or {})
+
+class Variable(ComputedObject):
+    def __init__(self):
+        super().__init__('_variable')
+
+class Function(ComputedObject):
+    def __init__(self, params, body):
+        super().__init__('_function', (body,))
+        self.params = params
+
+def _function(arg):
+    # Python callables (e.g. passed to map) are traced once with placeholder variables, as the real client does
+    if callable(arg) and not isinstance(arg, (ComputedObject, type)):
+        params = [Variable() for name, param in inspect.signature(arg).parameters.items() if param.default is param.empty]
+        return Function(params, arg(*params))
+    return arg
+
+def _cast(type_name, arg, load=None):
+    # ee.Image(x), ee.List(x), ... - a no-op on the graph for computed objects, a constant otherwise
+    if isinstance(arg, str) and load:
+        return (load, (arg,))
+    return ('_cast_' + type_name, (arg,))
+
+class Image(ComputedObject):
+    def __init__(self, arg=None):
+        super().__init__(*_cast('Image', arg, 'Image.load'))
+
+    @staticmethod
+    def pixelArea():
+        return Image._node('Image.pixelArea')
+
+    @staticmethod
+    def constant(value):
+        return Image._node('Image.constant', value)
+
+    @staticmethod
+    def cat(*images):
+        return Image._node('Image.cat', *images)
+
+    @staticmethod
+    def _node(func, *args, **kwargs):
+        return ComputedObject(func, args, kwargs)
+
+class ImageCollection(ComputedObject):
+    def __init__(self, arg):
+        super().__init__(*_cast('ImageCollection', arg, 'ImageCollection.load'))
+
+    @staticmethod
+    def fromImages(images):
+        return ComputedObject('ImageCollection.fromImages', (images,))
+
+class List(ComputedObject):
+    def __init__(self, arg):
+        super().__init__(*_cast('List', arg))
+
+    @staticmethod
+    def sequence(start, end=None, step=1):
+        return ComputedObject('List.sequence', (start, end, step))
+
+class Dictionary(ComputedObject):
+    def __init__(self, arg=None):
+        super().__init__(*_cast('Dictionary', {} if arg is None else arg))
+
+    @staticmethod
+    def fromLists(keys, values):
+        return ComputedObject('Dictionary.fromLists', (keys, values))
+
+class Number(ComputedObject):
+    def __init__(self, arg):
+        super().__init__(*_cast('Number', arg))
+
+class String(ComputedObject):
+    def __init__(self, arg):
+        super().__init__(*_cast('String', arg))
+
+class Array(ComputedObject):
+    def __init__(self, arg):
+        super().__init__(*_cast('Array', arg))
+
+class Date(ComputedObject):
+    def __init__(self, arg):
+        super().__init__(*_cast('Date', arg))
+
+class Geometry(ComputedObject):
+    def __init__(self, arg):
+        super().__init__(*_cast('Geometry', arg))
+
+    @staticmethod
+    def Point(coords, *args):
+        return ComputedObject('Geometry.Point', (coords,))
+
+    @staticmethod
+    def Rectangle(coords, *args):
+        return ComputedObject('Geometry.Rectangle', (coords,))
+
+    @staticmethod
+    def Polygon(coords, *args):
+        return ComputedObject('Geometry.Polygon', (coords,))
+
+class Feature(ComputedObject):
+    def __init__(self, geometry, properties=None):
+        super().__init__('Feature', (geometry, properties or {}))
+
+class FeatureCollection(ComputedObject):
+    def __init__(self, arg):
+        super().__init__('FeatureCollection', (arg,))
+
+def _static(func_prefix, *names):
+    return {name: staticmethod(lambda *args, _name=name, **kwargs: ComputedObject(f'{func_prefix}.{_name}', args, kwargs)) for name in names}
+
+Filter = type('Filter', (), _static('Filter', 'eq', 'neq', 'lt', 'lte', 'gt', 'gte', 'inList', 'And', 'Or', 'equals', 'date'))
+Join = type('Join', (), _static('Join', 'saveFirst', 'saveAll', 'inner', 'simple'))
+Reducer = type('Reducer', (), _static('Reducer', 'sum', 'mean', 'min', 'max', 'count', 'toList', 'histogram'))
+
+class EEException(Exception):
+    pass
+
+def Initialize(*args, **kwargs):
+    pass
+
+def Authenticate(*args, **kwargs):
+    pass
+
+# Local values
+
+class FakeImage:
+    __slots__ = ('bands', 'props')
+
+    def __init__(self, bands, props=None):
+        self.bands = bands  # band name -> value, None where masked
+        self.props = props or {}
+
+class FakeCollection(list):
+    pass
+
+class FakeArray(list):
+    pass
+
+class FakeDate:
+    def __init__(self, millis):
+        self.millis = millis
+
+class FakeGeometry:
+    def __init__(self, area, properties=None):
+        self.area = area  # m^2
+        self.properties = properties or {}
+
+class FakeFilter:
+    def __init__(self, predicate, left_field=None, right_field=None):
+        self.predicate = predicate  # image -> bool
+        self.left_field = left_field  # set for ee.Filter.equals(leftField=..., rightField=...) join conditions
+        self.right_field = right_field
+
+class FakeReducer:
+    def __init__(self, kind, *args):
+        self.kind = kind
+        self.args = args
+
+class FakeJoin:
+    def __init__(self, kind, key=None):
+        self.kind = kind
+        self.key = key
+
+class TileFetcher:
+    def __init__(self, url_format):
+        self.url_format = url_format
+
+def _millis(value):
+    if isinstance(value, FakeDate):
+        return value.millis
+    if isinstance(value, (int, float)):
+        return value
+    date = datetime.datetime.fromisoformat(str(value)[:10]).replace(tzinfo=datetime.timezone.utc)
+    return int(date.timestamp() * 1000)
+
+def _format_date(millis, pattern):
+    for joda, strftime in [('YYYY', '%Y'), ('yyyy', '%Y'), ('MM', '%m'), ('dd', '%d'), ('HH', '%H'), ('mm', '%M'), ('ss', '%S')]:
+        pattern = pattern.replace(joda, strftime)
+    return datetime.datetime.fromtimestamp(millis / 1000, datetime.timezone.utc).strftime(pattern)
+
+_BINARY = {
+    'add': lambda a, b: a + b, 'subtract': lambda a, b: a - b, 'multiply': lambda a, b: a * b,
+    'divide': lambda a, b: a / b if b else 0, 'pow': lambda a, b: a ** b, 'min': min, 'max': max,
+    'eq': lambda a, b: int(a == b), 'neq': lambda a, b: int(a != b), 'lt': lambda a, b: int(a < b), 'lte': lambda a, b: int(a <= b),
+    'gt': lambda a, b: int(a > b), 'gte': lambda a, b: int(a >= b), 'And': lambda a, b: int(bool(a) and bool(b)),
+    'Or': lambda a, b: int(bool(a) or bool(b)), 'bitwiseAnd': lambda a, b: int(a) & int(b),
+}
+
+def _scalar(op, a, b):
+    if a is None or b is None:
+        return None
+    try:
+        return _BINARY[op](a, b)
+    except (ArithmeticError, TypeError, ValueError):
+        return None
+
+def _binary(op, a, b):
+    if isinstance(a, FakeImage):
+        if isinstance(b, FakeImage):
+            others = list(b.bands.values())
+            return FakeImage({name: _scalar(op, value, others[i] if len(others) > 1 else others[0]) for i, (name, value) in enumerate(a.bands.items())})
+        return FakeImage({name: _scalar(op, value, b) for name, value in a.bands.items()})
+    if isinstance(a, FakeArray):
+        others = b if isinstance(b, FakeArray) else [b] * len(a)
+        return FakeArray(_scalar(op, x, y) for x, y in zip(a, others))
+    return _scalar(op, a, b)
+
+def _unary(fn):
+    def apply(value):
+        if isinstance(value, FakeImage):
+            return FakeImage({name: None if band is None else fn(band) for name, band in value.bands.items()}, value.props)
+        return fn(value)
+    return apply
+
+def _band_names(*names):
+    return list(names[0]) if len(names) == 1 and isinstance(names[0], list) else list(names)
+
+def _select(image, *names, **kwargs):
+    names = _band_names(*names) if names else kwargs.get('bandSelectors', [])
+    return FakeImage({name: image.bands.get(name) for name in names}, image.props)
+
+def _rename(image, *names):
+    return FakeImage(dict(zip(_band_names(*names), image.bands.values())), image.props)
+
+def _update_mask(image, mask):
+    masks = list(mask.bands.values()) if isinstance(mask, FakeImage) else [mask]
+    return FakeImage({name: value if masks[i if len(masks) > 1 else 0] else None for i, (name, value) in enumerate(image.bands.items())}, image.props)
+
+def _normalized_difference(image, names=None):
+    first, second = (image.bands.get(name) for name in names) if names else list(image.bands.values())[:2]
+    if first is None or second is None or first < 0 or second < 0:
+        return FakeImage({'nd': None})
+    return FakeImage({'nd': (first - second) / (first + second) if first + second else 0.0})
+
+def _expression(image, expression, variables=None):
+    values = {}
+    for name, value in (variables or {}).items():
+        values[name] = next(iter(value.bands.values()), None) if isinstance(value, FakeImage) else value
+    functions = {name: getattr(math, name) for name in ('log', 'log10', 'exp', 'sqrt', 'sin', 'cos', 'tan')}
+    functions['abs'] = abs
+    try:
+        result = eval(expression, {'__builtins__': {}}, {**functions, **values})
+    except (ArithmeticError, TypeError, ValueError):
+        result = None
+    return FakeImage({'constant': result})
+
+def _copy_properties(image, source=None, properties=None, exclude=None):
+    props = dict(image.props)
+    for key, value in (source.props if isinstance(source, FakeImage) else {}).items():
+        if (properties is None or key in properties) and key not in (exclude or []):
+            props[key] = value
+    return FakeImage(image.bands, props)
+
+def _set(element, *args):
+    props = dict(element.props)
+    props.update(args[0] if len(args) == 1 else dict(zip(args[::2], args[1::2])))
+    return FakeImage(element.bands, props)
+
+def _pixel_count(geometry, scale, max_pixels=None):
+    count = max(1, round((geometry.area if isinstance(geometry, FakeGeometry) else 0) / float(scale or 30) ** 2))
+    return min(count, int(max_pixels)) if max_pixels else count
+
+def _histogram(value, pixels, max_buckets=None):
+    # Synthetic bimodal histogram around the band value, so Otsu thresholds have something to split
+    if value is None:
+        return None
+    buckets = min(int(max_buckets or 20), 20)
+    means = [value - 1 + 1.5 * i / (buckets - 1) for i in range(buckets)]
+    counts = [pixels * (math.exp(-((m - value + 0.6) / 0.2) ** 2) + math.exp(-((m - value - 0.2) / 0.15) ** 2)) for m in means]
+    return {'histogram': counts, 'bucketMeans': means, 'bucketMin': means[0], 'bucketWidth': means[1] - means[0]}
+
+def _reduce_values(reducer, values):
+    values = [value for value in values if value is not None]
+    if reducer.kind == 'sum':
+        return sum(values)
+    if reducer.kind == 'mean':
+        return sum(values) / len(values) if values else None
+    if reducer.kind == 'min':
+        return min(values) if values else None
+    if reducer.kind == 'max':
+        return max(values) if values else None
+    if reducer.kind == 'count':
+        return len(values)
+    return list(values)
+
+def _reduce_region(image, reducer, geometry=None, scale=None, maxPixels=None, bestEffort=False, **kwargs):
+    pixels = _pixel_count(geometry, scale, maxPixels)
+    result = {}
+    for name, value in image.bands.items():
+        if reducer.kind == 'sum':
+            result[name] = 0 if value is None else value * pixels
+        elif reducer.kind == 'count':
+            result[name] = 0 if value is None else pixels
+        elif reducer.kind == 'histogram':
+            result[name] = _histogram(value, pixels, reducer.args[0] if reducer.args else None)
+        else:
+            result[name] = value
+    return result
+
+def _mosaic(collection):
+    # Last image on top, like ee.ImageCollection.mosaic
+    bands = {}
+    for image in collection:
+        for name, value in image.bands.items():
+            if value is not None or name not in bands:
+                bands[name] = value
+    return FakeImage(bands)
+
+def _key(value):
+    return json.dumps(_to_info(value), sort_keys=True, default=str)
+
+def _distinct(collection, properties):
+    properties = properties if isinstance(properties, list) else [properties]
+    seen, result = set(), FakeCollection()
+    for image in collection:
+        key = _key([image.props.get(name) for name in properties])
+        if key not in seen:
+            seen.add(key)
+            result.append(image)
+    return result
+
+def _sort(collection, prop, ascending=True):
+    present = [image for image in collection if image.props.get(prop) is not None]
+    missing = [image for image in collection if image.props.get(prop) is None]
+    return FakeCollection(sorted(present, key=lambda image: image.props[prop], reverse=not ascending) + missing)
+
+def _reduce_columns(collection, reducer, selectors, weightSelectors=None):
+    rows = [[image.props.get(name) for name in selectors] for image in collection]
+    rows = [row for row in rows if None not in row]
+    if reducer.kind == 'toList':
+        return {'list': rows if len(selectors) > 1 else [row[0] for row in rows]}
+    return {reducer.kind: _reduce_values(reducer, [row[0] for row in rows])}
+
+def _join(join, primary, secondary, condition):
+    index = {}
+    for image in secondary:
+        index.setdefault(_key(image.props.get(condition.right_field)), []).append(image)
+    result = FakeCollection()
+    for image in primary:
+        matches = index.get(_key(image.props.get(condition.left_field)), [])
+        if not matches:
+            continue
+        if join.kind == 'saveFirst':
+            result.append(_set(image, {join.key: matches[0]}))
+        elif join.kind == 'saveAll':
+            result.append(_set(image, {join.key: list(matches)}))
+        else:
+            result.append(image)
+    return result
+
+def _filter_value(name, op, value):
+    def predicate(element):
+        prop = element.props.get(name) if isinstance(element, FakeImage) else None
+        return bool(_scalar(op, prop, value))
+    return FakeFilter(predicate)
+
+def _array_get(value, index):
+    if isinstance(index, list):
+        index = index[0]
+    try:
+        return value[index]
+    except (IndexError, KeyError, TypeError):
+        return None
+
+def _array_sort(array, keys=None):
+    keys = keys if keys is not None else array
+    order = sorted(range(len(array)), key=lambda i: (keys[i] is None, keys[i] or 0))
+    return FakeArray(array[i] for i in order)
+
+def _list_map(values, fn, dropNulls=False):
+    return [result for result in (fn(value) for value in values) if result is not None or not dropNulls]
+
+def _list_distinct(values):
+    seen, result = set(), []
+    for value in values:
+        key = _key(value)
+        if key not in seen:
+            seen.add(key)
+            result.append(value)
+    return result
+
+def _to_info(value):
+    if isinstance(value, FakeImage):
+        return {'type': 'Image', 'bands': [{'id': name} for name in value.bands], 'properties': _to_info(value.props)}
+    if isinstance(value, FakeCollection):
+        return {'type': 'ImageCollection', 'features': [_to_info(image) for image in value]}
+    if isinstance(value, FakeDate):
+        return {'type': 'Date', 'value': value.millis}
+    if isinstance(value, FakeGeometry):
+        return {'type': 'Feature', 'area': value.area, 'properties': _to_info(value.properties)}
+    if isinstance(value, (list, tuple)):
+        return [_to_info(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _to_info(item) for key, item in value.items()}
+    if isinstance(value, (FakeFilter, FakeReducer, FakeJoin)) or callable(value):
+        return type(value).__name__
+    return value
+
+_IMAGE_METHODS = {
+    'select': _select, 'rename': _rename, 'updateMask': _update_mask, 'normalizedDifference': _normalized_difference,
+    'expression': _expression, 'copyProperties': _copy_properties, 'set': _set, 'reduceRegion': _reduce_region,
+    'addBands': lambda image, other, names=None, overwrite=False: FakeImage({**image.bands, **other.bands}, image.props),
+    'bandNames': lambda image: list(image.bands),
+    'get': lambda image, prop: image.props.get(prop),
+    'date': lambda image: FakeDate(image.props.get('system:time_start')),
+    'toDictionary': lambda image, properties=None: {key: image.props[key] for key in (image.props if properties is None else properties) if key in image.props},
+    'clip': lambda image, geometry: image,
+    'int': _unary(int), 'toFloat': _unary(float), 'abs': _unary(abs), 'Not': _unary(lambda value: int(not value)),
+    'log': _unary(lambda value: math.log(value) if value > 0 else None),
+    'unmask': lambda image, value=0: FakeImage({name: value if band is None else band for name, band in image.bands.items()}, image.props),
+}
+
+_COLLECTION_METHODS = {
+    'filter': lambda collection, f: FakeCollection(image for image in collection if f.predicate(image)),
+    'filterDate': lambda collection, start, end=None: FakeCollection(image for image in collection if _millis(start) <= image.props.get('system:time_start', 0) < (_millis(end) if end is not None else _millis(start) + 86400000)),
+    'filterBounds': lambda collection, geometry: collection,
+    'map': lambda collection, fn, dropNulls=False: FakeCollection(_list_map(collection, fn, True)),
+    'merge': lambda collection, other: FakeCollection(list(collection) + list(other)),
+    'sort': _sort, 'distinct': _distinct, 'reduceColumns': _reduce_columns, 'mosaic': _mosaic,
+    'aggregate_array': lambda collection, prop: [image.props[prop] for image in collection if image.props.get(prop) is not None],
+    'first': lambda collection: collection[0] if collection else None,
+    'size': lambda collection: len(collection),
+    'toList': lambda collection, count=None, offset=0: list(collection)[offset:offset + count if count is not None else None],
+    'limit': lambda collection, count, prop=None, ascending=True: FakeCollection((_sort(collection, prop, ascending) if prop else collection)[:count]),
+}
+
+_LIST_METHODS = {
+    'get': _array_get, 'map': _list_map, 'distinct': _list_distinct,
+    'size': lambda values: len(values), 'length': lambda values: len(values),
+    'slice': lambda values, start, end=None, step=1: values[start:end:step],
+    'add': lambda values, value: list(values) + [value], 'cat': lambda values, other: list(values) + list(other),
+    'contains': lambda values, value: value in values, 'indexOf': lambda values, value: values.index(value) if value in values else -1,
+    'sort': lambda values, keys=None: [value for value in _array_sort(values, keys)],
+    'reduce': lambda values, reducer: _reduce_values(reducer, values),
+    'flatten': lambda values: [item for value in values for item in (value if isinstance(value, list) else [value])],
+    'zip': lambda values, other: [[a, b] for a, b in zip(values, other)],
+}
+
+_ARRAY_METHODS = {
+    'get': _array_get, 'sort': _array_sort,
+    'length': lambda array: FakeArray([len(array)]),
+    'reduce': lambda array, reducer, axes=None: FakeArray([_reduce_values(reducer, array)]),
+    'accumulate': lambda array, axis=0, reducer=None: FakeArray(_accumulate(array)),
+    'slice': lambda array, axis=0, start=0, end=None, step=1: FakeArray(array[int(start):None if end is None else int(end):int(step)]),
+    'toList': lambda array: list(array),
+}
+
+def _accumulate(values):
+    total = 0
+    for value in values:
+        total += value or 0
+        yield total
+
+_DICTIONARY_METHODS = {
+    'get': lambda values, key, default=None: values.get(key, default),
+    'getNumber': lambda values, key: values.get(key), 'getString': lambda values, key: values.get(key),
+    'getArray': lambda values, key: FakeArray(values.get(key) or []),
+    'keys': lambda values: list(values), 'size': lambda values: len(values), 'contains': lambda values, key: key in values,
+    'values': lambda values, keys=None: [values[key] for key in (keys if keys is not None else values)],
+    'set': lambda values, key, value: {**values, key: value},
+    'combine': lambda values, other, overwrite=True: {**values, **other} if overwrite else {**other, **values},
+}
+
+_NUMBER_METHODS = {
+    'int': int, 'toInt': int, 'float': float, 'toFloat': float, 'round': round, 'abs': abs, 'log': math.log, 'sqrt': math.sqrt,
+    'format': lambda value, pattern='%s': pattern % value,
+}
+
+_STRING_METHODS = {
+    'cat': lambda value, other: value + str(other), 'length': len,
+    'slice': lambda value, start, end=None: value[start:end], 'compareTo': lambda value, other: (value > other) - (value < other),
+}
+
+_DATE_METHODS = {
+    'format': lambda date, pattern=None, timeZone=None: _format_date(date.millis, pattern or 'YYYY-MM-dd\'T\'HH:mm:ss').replace("'T'", 'T'),
+    'millis': lambda date: date.millis,
+    'advance': lambda date, delta, unit: FakeDate(date.millis + delta * {'day': 86400000, 'hour': 3600000, 'week': 604800000}[unit]),
+}
+
+def _buffer(geometry, distance, *args):
+    side = math.sqrt(geometry.area)
+    return FakeGeometry((side + 2 * distance) ** 2 if side else math.pi * distance ** 2, geometry.properties)
+
+_GEOMETRY_METHODS = {
+    'geometry': lambda geometry, *args: geometry, 'buffer': _buffer, 'bounds': lambda geometry, *args: geometry,
+    'area': lambda geometry, *args: geometry.area, 'get': lambda geometry, prop: geometry.properties.get(prop),
+}
+
+_REDUCER_METHODS = {'combine': lambda reducer, other, outputPrefix='', sharedInputs=False: FakeReducer('combined', reducer, other)}
+
+_JOIN_METHODS = {'apply': _join}
+
+_METHODS = [(FakeImage, _IMAGE_METHODS), (FakeCollection, _COLLECTION_METHODS), (FakeArray, _ARRAY_METHODS), (list, _LIST_METHODS),
+            (dict, _DICTIONARY_METHODS), (FakeDate, _DATE_METHODS), (FakeGeometry, _GEOMETRY_METHODS), (FakeReducer, _REDUCER_METHODS),
+            (FakeJoin, _JOIN_METHODS), (str, _STRING_METHODS), ((int, float), _NUMBER_METHODS)]
+
+def _call_method(receiver, name, args, kwargs):
+    for value_type, methods in _METHODS:
+        if isinstance(receiver, value_type):
+            if name in methods:
+                return methods[name](receiver, *args, **kwargs)
+            if name in _BINARY and isinstance(receiver, (FakeImage, FakeArray, int, float)):
+                return _binary(name, receiver, args[0])
+            break
+    raise NotImplementedError(f'{type(receiver).__name__}.{name} is not supported by the fake Earth Engine backend')
+
+def _rectangle_area(coords):
+    west, south, east, north = coords if len(coords) == 4 else (coords[0][0], coords[0][1], coords[1][0], coords[1][1])
+    return abs(east - west) * 111320 * math.cos(math.radians((north + south) / 2)) * abs(north - south) * 110540
+
+def _polygon_area(coords):
+    ring = coords[0] if coords and isinstance(coords[0][0], (list, tuple)) else coords
+    lat = sum(point[1] for point in ring) / len(ring)
+    area = sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1])) / 2
+    return abs(area) * 111320 * math.cos(math.radians(lat)) * 110540
+
+def _cast_value(type_name, value):
+    if type_name == 'Array' and isinstance(value, list):
+        return FakeArray(value)
+    if type_name == 'Date':
+        return FakeDate(_millis(value))
+    if type_name == 'Image' and isinstance(value, (int, float)):
+        return FakeImage({'constant': value})
+    return value
+
+_CONSTRUCTORS = {
+    'ImageCollection.load': lambda backend, collection_id: backend.catalog(collection_id),
+    'Image.load': lambda backend, image_id: None,
+    'Image.pixelArea': lambda backend: FakeImage({'area': backend.pixel_area}),
+    'Image.constant': lambda backend, value: FakeImage({'constant': value}),
+    'Image.cat': lambda backend, *images: FakeImage({name: value for image in (images[0] if len(images) == 1 and isinstance(images[0], list) else images) for name, value in image.bands.items()}),
+    'ImageCollection.fromImages': lambda backend, images: FakeCollection(image for image in images if image is not None),
+    'List.sequence': lambda backend, start, end=None, step=1: list(range(int(start), int(end) + 1, int(step or 1))) if end is not None else list(range(int(start))),
+    'Dictionary.fromLists': lambda backend, keys, values: dict(zip(keys, values)),
+    'Geometry.Point': lambda backend, coords: FakeGeometry(0),
+    'Geometry.Rectangle': lambda backend, coords: FakeGeometry(_rectangle_area(coords)),
+    'Geometry.Polygon': lambda backend, coords: FakeGeometry(_polygon_area(coords)),
+    'Feature': lambda backend, geometry, properties: FakeGeometry(geometry.area if geometry else 0, properties),
+    'FeatureCollection': lambda backend, features: FakeGeometry(sum(feature.area for feature in features) if isinstance(features, list) else features.area),
+    'Filter.eq': lambda backend, name, value: _filter_value(name, 'eq', value),
+    'Filter.neq': lambda backend, name, value: _filter_value(name, 'neq', value),
+    'Filter.lt': lambda backend, name, value: _filter_value(name, 'lt', value),
+    'Filter.lte': lambda backend, name, value: _filter_value(name, 'lte', value),
+    'Filter.gt': lambda backend, name, value: _filter_value(name, 'gt', value),
+    'Filter.gte': lambda backend, name, value: _filter_value(name, 'gte', value),
+    'Filter.inList': lambda backend, name, values: FakeFilter(lambda element: element.props.get(name) in values),
+    'Filter.And': lambda backend, *filters: FakeFilter(lambda element: all(f.predicate(element) for f in filters)),
+    'Filter.Or': lambda backend, *filters: FakeFilter(lambda element: any(f.predicate(element) for f in filters)),
+    'Filter.date': lambda backend, start, end=None: FakeFilter(lambda element: _millis(start) <= element.props.get('system:time_start', 0) < _millis(end)),
+    'Filter.equals': lambda backend, leftField=None, rightValue=None, rightField=None, leftValue=None:
+                     FakeFilter(lambda element: element.props.get(leftField) == rightValue, leftField, rightField),
+    'Join.saveFirst': lambda backend, matchKey, *args, **kwargs: FakeJoin('saveFirst', matchKey),
+    'Join.saveAll': lambda backend, matchesKey, *args, **kwargs: FakeJoin('saveAll', matchesKey),
+    'Join.inner': lambda backend, *args, **kwargs: FakeJoin('inner'),
+    'Join.simple': lambda backend: FakeJoin('simple'),
+    'Reducer.sum': lambda backend: FakeReducer('sum'),
+    'Reducer.mean': lambda backend: FakeReducer('mean'),
+    'Reducer.min': lambda backend: FakeReducer('min'),
+    'Reducer.max': lambda backend: FakeReducer('max'),
+    'Reducer.count': lambda backend: FakeReducer('count'),
+    'Reducer.toList': lambda backend, numOptional=None, tupleSize=None: FakeReducer('toList', numOptional),
+    'Reducer.histogram': lambda backend, maxBuckets=None, minBucketWidth=None, maxRaw=None: FakeReducer('histogram', maxBuckets, minBucketWidth),
+}
+
+def _free_variables(obj):
+    if isinstance(obj, ComputedObject):
+        free = obj.__dict__.get('_free')
+        if free is None:
+            if isinstance(obj, Variable):
+                free = frozenset([obj])
+            else:
+                free = frozenset().union(*(_free_variables(arg) for arg in obj.args), *(_free_variables(value) for value in obj.kwargs.values()))
+                if isinstance(obj, Function):
+                    free -= frozenset(obj.params)
+            obj.__dict__['_free'] = free
+        return free
+    if isinstance(obj, (list, tuple)):
+        return frozenset().union(*(_free_variables(item) for item in obj))
+    if isinstance(obj, dict):
+        return frozenset().union(*(_free_variables(value) for value in obj.values()))
+    return frozenset()
+
+class _Evaluator:
+    def __init__(self, backend):
+        self.backend = backend
+        self._memo = {}  # id(node) -> (node, value) of nodes that don't depend on a function's variables
+
+    def evaluate(self, obj, env=None):
+        if isinstance(obj, Variable):
+            return env[obj]
+        if isinstance(obj, ComputedObject):
+            if _free_variables(obj):
+                return self._apply(obj, env)
+            if id(obj) not in self._memo:
+                self._memo[id(obj)] = (obj, self._apply(obj, env))
+            return self._memo[id(obj)][1]
+        if isinstance(obj, (list, tuple)):
+            return [self.evaluate(item, env) for item in obj]
+        if isinstance(obj, dict):
+            return {key: self.evaluate(value, env) for key, value in obj.items()}
+        return obj
+
+    def _apply(self, obj, env):
+        if isinstance(obj, Function):
+            return lambda *values: self.evaluate(obj.args[0], {**(env or {}), **dict(zip(obj.params, values))})
+        args = [self.evaluate(arg, env) for arg in obj.args]
+        kwargs = {key: self.evaluate(value, env) for key, value in obj.kwargs.items()}
+        if obj.func.startswith('_cast_'):
+            return None if args[0] is None else _cast_value(obj.func[len('_cast_'):], args[0])
+        if obj.func.startswith('.'):
+            if args[0] is None:
+                return None  # nulls propagate instead of failing
+            return _call_method(args[0], obj.func[1:], args[1:], kwargs)
+        return _CONSTRUCTORS[obj.func](self.backend, *args, **kwargs)
+
+# Graph introspection
+
+def graph_size(obj):
+    # Number of distinct function invocations in the expression graph (including mapped function bodies)
+    seen = set()
+    stack = [obj]
+    count = 0
+    while stack:
+        item = stack.pop()
+        if isinstance(item, ComputedObject):
+            if id(item) in seen:
+                continue
+            seen.add(id(item))
+            if not item.func.startswith('_'):
+                count += 1
+            stack.extend(item.args)
+            stack.extend(item.kwargs.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+    return count
+
+class _Encoder:
+    def __init__(self):
+        self.values = {}
+        self._ids = {}  # encoded node json -> value id, so identical subexpressions are stored once
+        self._refs = {}  # id(node) -> reference
+        self._variables = {}
+
+    def variable(self, var):
+        return self._variables.setdefault(var, f'_MAPPING_VAR_{len(self._variables)}')
+
+    def encode(self, obj):
+        if isinstance(obj, Variable):
+            return {'argumentReference': self.variable(obj)}
+        if isinstance(obj, ComputedObject):
+            if obj.func.startswith('_cast_'):
+                return self.encode(obj.args[0])
+            if id(obj) not in self._refs:
+                if isinstance(obj, Function):
+                    names = [self.variable(param) for param in obj.params]
+                    node = {'functionDefinitionValue': {'argumentNames': names, 'body': self.encode(obj.args[0])}}
+                else:
+                    arguments = {str(i): self.encode(arg) for i, arg in enumerate(obj.args)}
+                    arguments.update({key: self.encode(value) for key, value in obj.kwargs.items()})
+                    node = {'functionInvocationValue': {'functionName': obj.func.lstrip('.'), 'arguments': arguments}}
+                key = json.dumps(node, sort_keys=True)
+                if key not in self._ids:
+                    self._ids[key] = str(len(self._ids))
+                    self.values[self._ids[key]] = node
+                self._refs[id(obj)] = (obj, {'valueReference': self._ids[key]})
+            return self._refs[id(obj)][1]
+        if isinstance(obj, (list, tuple)):
+            return {'arrayValue': {'values': [self.encode(item) for item in obj]}}
+        if isinstance(obj, dict):
+            return {'dictionaryValue': {'values': {str(key): self.encode(value) for key, value in obj.items()}}}
+        return {'constantValue': obj}
+
+class serializer:
+    @staticmethod
+    def encode(obj, for_cloud_api=True):
+        # Same shape as the real ee.serializer.encode output: {'result': id, 'values': {id: node}}
+        encoder = _Encoder()
+        result = encoder.encode(obj)
+        if 'valueReference' in result:
+            return {'result': result['valueReference'], 'values': encoder.values}
+        return {'result': '0', 'values': {'0': result}}
+
+# Synthetic catalog
+
+def _default_tiles():
+    from RadGEEToolbox_regions import default_registry
+    regions = default_registry().regions.values()
+    landsat = sorted({(region['path'], row) for region in regions for row in (region['row_N'], region['row_S'])})
+    sentinel2 = sorted({tile for region in regions for tile in (region['tile_N'], region['tile_S'])})
+    return landsat, sentinel2
+
+_LANDSAT_MISSIONS = {
+    'LANDSAT/LC08/C02/T1_L2': ('LANDSAT_8', '2013-04-11', None, 0),
+    'LANDSAT/LC09/C02/T1_L2': ('LANDSAT_9', '2021-10-31', None, 8),
+    'LANDSAT/LT05/C02/T1_L2': ('LANDSAT_5', '1984-03-01', '2011-11-18', 4),
+}
+
+def _landsat_image(spacecraft, path, row, millis, date):
+    rng = random.Random(f'{spacecraft}{path}{row}{date}')
+    cloud = round(rng.uniform(0, 100) ** 2 / 100, 2)
+    qa = 21824 | (8 if rng.random() < cloud / 100 else 0) | (4 if rng.random() < 0.05 else 0)
+    bands = {f'SR_B{i}': rng.uniform(7000, 20000) for i in (1, 2, 3, 4, 5, 6, 7)}
+    if spacecraft == 'LANDSAT_5':
+        del bands['SR_B6']
+    bands['QA_PIXEL'] = qa
+    bands.update({'ST_ATRAN': rng.uniform(7500, 8500), 'ST_EMIS': rng.uniform(9700, 9900), 'ST_DRAD': rng.uniform(800, 1200),
+                  'ST_TRAD': rng.uniform(8000, 10000), 'ST_URAD': rng.uniform(1200, 1800)})
+    props = {'system:time_start': millis, 'SPACECRAFT_ID': spacecraft, 'WRS_PATH': path, 'WRS_ROW': row, 'CLOUD_COVER': cloud}
+    return FakeImage(bands, props)
+
+def _sentinel2_image(tile, millis, date, index):
+    rng = random.Random(f'S2{tile}{date}')
+    cloud = round(rng.uniform(0, 100) ** 2 / 100, 2)
+    bands = {name: rng.uniform(300, 5000) for name in ('B2', 'B3', 'B4', 'B8', 'B11', 'B12')}
+    bands['SCL'] = 9 if rng.random() < cloud / 100 else rng.choice([4, 5, 6])
+    props = {'system:time_start': millis, 'SPACECRAFT_NAME': 'Sentinel-2A' if index % 2 == 0 else 'Sentinel-2B', 'MGRS_TILE': tile,
+             'CLOUDY_PIXEL_PERCENTAGE': cloud, 'NODATA_PIXEL_PERCENTAGE': round(rng.uniform(0, 60) if rng.random() < 0.3 else 0.0, 2)}
+    return FakeImage(bands, props)
+
+def _acquisitions(first, last, revisit, offset, start, end):
+    # Acquisition dates every `revisit` days from first + offset, clipped to the catalog window
+    day = datetime.date.fromisoformat(first) + datetime.timedelta(days=offset % revisit)
+    start, end = max(start, day), min(end, datetime.date.fromisoformat(last) if last else end)
+    if start > day:
+        day += datetime.timedelta(days=-(-(start - day).days // revisit) * revisit)
+    while day <= end:
+        yield day
+        day += datetime.timedelta(days=revisit)
+
+# Backend
+
+class Recording:
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}  # 'site|kind|ordinal' -> {'result': ..., 'latency': seconds}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    def add(self, site, kind, ordinal, result, latency):
+        self.entries[f'{site}|{kind}|{ordinal}'] = {'result': result, 'latency': latency}
+
+    def lookup(self, site, kind, ordinal):
+        key = f'{site}|{kind}|{ordinal}'
+        if key not in self.entries:
+            raise LookupError(f'no recorded result for {key}')
+        return self.entries[key]
+
+    def save(self, path=None):
+        path = path or self.path
+        with open(path, 'w') as f:
+            json.dump(self.entries, f)
+        return path
+
+# Toolbox call wrappers every remote call passes through, as (file name, qualified name), so the recorded site is the
+# toolbox function that asked for the result (e.g. RadGEEToolbox_v1_0_2.py:dates) whether or not instrumentation or a
+# ResultCache is in between
+_SKIPPED_FRAMES = {(module, qualname) for module in ('RadGEEToolbox_v1_0_2.py', 'RadGEEToolbox_v1_0_1.py')
+                   for qualname in ('get_info', 'Instrumentation.call', 'ResultCache.get_info')}
+
+def _call_site():
+    # file:function of the first caller outside this module, the ee package and the toolbox's call wrappers
+    frame = sys._getframe(1)
+    while frame is not None:
+        code = frame.f_code
+        filename = code.co_filename
+        qualname = getattr(code, 'co_qualname', code.co_name)  # Python 3.11+
+        if (os.path.abspath(filename) != _HERE and os.sep + 'ee' + os.sep not in filename
+                and (os.path.basename(filename), qualname) not in _SKIPPED_FRAMES):
+            return f'{os.path.basename(filename)}:{code.co_name}'
+        frame = frame.f_back
+    return '<unknown>'
+
+def _recordable(kind, result):
+    if kind == 'getMapId':
+        return {'mapid': result.get('mapid'), 'token': result.get('token'), 'url_format': result['tile_fetcher'].url_format}
+    return result
+
+class FakeBackend:
+    def __init__(self, **config):
+        self.latency = 0.0  # seconds per remote call, or a callable(kind, nodes) -> seconds, or 'recorded' when replaying
+        self.latency_per_node = 0.0  # extra seconds per graph node, to model large expressions
+        self.mode = None  # None (interpret), 'record' or 'replay'
+        self.recording = Recording()
+        self.catalog_start = '2020-01-01'
+        self.catalog_end = None  # today
+        self.landsat_tiles = None  # [(path, row), ...], defaults to the tiles of the app regions
+        self.sentinel2_tiles = None  # ['12TVL', ...], likewise
+        self.pixel_area = 900.0  # m^2, value of ee.Image.pixelArea()
+        self._lock = threading.Lock()
+        self._catalog = {}
+        self.configure(**config)
+        self.reset()
+
+    def configure(self, **config):
+        for key, value in config.items():
+            if not hasattr(self, key) or key.startswith('_'):
+                raise TypeError(f'unknown fake backend option {key!r}')
+            setattr(self, key, value)
+        if 'recording' in config and not isinstance(self.recording, Recording):
+            self.recording = Recording(self.recording)
+        if {'catalog_start', 'catalog_end', 'landsat_tiles', 'sentinel2_tiles'} & set(config):
+            self._catalog = {}
+        return self
+
+    def reset(self):
+        # Clears the call log and the replay ordinals
+        with self._lock:
+            self.calls = []
+            self._ordinals = {}
+
+    def call_counts(self):
+        counts = {}
+        for call in self.calls:
+            counts[call['kind']] = counts.get(call['kind'], 0) + 1
+        return counts
+
+    def catalog(self, collection_id):
+        with self._lock:
+            if collection_id not in self._catalog:
+                self._catalog[collection_id] = self._generate(collection_id)
+            return self._catalog[collection_id]
+
+    def _generate(self, collection_id):
+        default_landsat, default_sentinel2 = _default_tiles() if self.landsat_tiles is None or self.sentinel2_tiles is None else (None, None)
+        start = datetime.date.fromisoformat(self.catalog_start)
+        end = datetime.date.fromisoformat(self.catalog_end) if self.catalog_end else datetime.date.today()
+        images = []
+        if collection_id in _LANDSAT_MISSIONS:
+            spacecraft, first, last, offset = _LANDSAT_MISSIONS[collection_id]
+            for path, row in self.landsat_tiles or default_landsat:
+                for day in _acquisitions(first, last, 16, offset + path * 7, start, end):
+                    millis = _millis(day.isoformat()) + 18 * 3600000 + row * 24000
+                    images.append(_landsat_image(spacecraft, path, row, millis, day))
+        elif collection_id.startswith('COPERNICUS/S2'):
+            for tile in self.sentinel2_tiles or default_sentinel2:
+                for i, day in enumerate(_acquisitions('2017-03-28', None, 5, sum(map(ord, tile[:4])), start, end)):  # tiles of a column share an orbit
+                    images.append(_sentinel2_image(tile, _millis(day.isoformat()) + 18 * 3600000, day, i))
+        return FakeCollection(sorted(images, key=lambda image: image.props['system:time_start']))
+
+    def _delay(self, kind, nodes):
+        if callable(self.latency):
+            return self.latency(kind, nodes)
+        return (self.latency if isinstance(self.latency, (int, float)) else 0.0) + self.latency_per_node * nodes
+
+    def _compute(self, kind, obj, params):
+        value = _Evaluator(self).evaluate(obj)
+        if kind == 'getInfo':
+            return _to_info(value)
+        digest = hashlib.sha256(json.dumps([serializer.encode(obj), params], sort_keys=True, default=str).encode('utf-8')).hexdigest()[:32]
+        if kind == 'getMapId':
+            return {'mapid': digest, 'token': '', 'url_format': f'https://earthengine.fake/v1/maps/{digest}/tiles/{{z}}/{{x}}/{{y}}'}
+        return f'https://earthengine.fake/v1/thumbnails/{digest}:getPixels'
+
+    def remote(self, kind, obj, params=None):
+        site = _call_site()
+        nodes = graph_size(obj)
+        with self._lock:
+            ordinal = self._ordinals.get((site, kind), 0)
+            self._ordinals[(site, kind)] = ordinal + 1
+        start = time.perf_counter()
+        if self.mode == 'replay':
+            entry = self.recording.lookup(site, kind, ordinal)
+            result = entry['result']
+            delay = entry['latency'] if self.latency == 'recorded' else self._delay(kind, nodes)
+        else:
+            result = self._compute(kind, obj, params)
+            delay = self._delay(kind, nodes)
+        time.sleep(max(0.0, delay - (time.perf_counter() - start)))
+        latency = time.perf_counter() - start
+        if self.mode == 'record':
+            self.recording.add(site, kind, ordinal, result, latency)
+        with self._lock:
+            self.calls.append({'kind': kind, 'site': site, 'nodes': nodes, 'latency': latency})
+        if kind == 'getMapId':
+            return {'mapid': result['mapid'], 'token': result['token'], 'tile_fetcher': TileFetcher(result['url_format'])}
+        return result
+
+backend = FakeBackend()
+
+def install(**config):
+    # Makes `import ee` resolve to this module, swaps it into already imported toolbox modules and configures the
+    # shared backend. Returns the backend
+    module = sys.modules[__name__]
+    sys.modules['ee'] = module
+    for name in ('RadGEEToolbox_v1_0_2', 'RadGEEToolbox_v1_0_1'):
+        if name in sys.modules:
+            sys.modules[name].ee = module
+    return backend.configure(**config)
+
+def record_live(recording, ee_module=None):
+    # Records every getInfo/getMapId/getThumbURL of a live Earth Engine session (credentials needed) into recording
+    # (a Recording or JSON path) under the same call sites and ordinals the fake backend replays them by. Returns a
+    # function restoring the original methods; save the recording with recording.save()
+    if ee_module is None:
+        import ee as ee_module
+    recording = recording if isinstance(recording, Recording) else Recording(recording)
+    ordinals = {}
+    lock = threading.Lock()
+    originals = []
+
+    def wrap(cls, name):
+        original = getattr(cls, name)
+        def recorded(self, *args, **kwargs):
+            site = _call_site()
+            with lock:
+                ordinal = ordinals.get((site, name), 0)
+                ordinals[(site, name)] = ordinal + 1
+            start = time.perf_counter()
+            result = original(self, *args, **kwargs)
+            recording.add(site, name, ordinal, _recordable(name, result), time.perf_counter() - start)
+            return result
+        originals.append((cls, name, original))
+        setattr(cls, name, recorded)
+
+    wrap(ee_module.ComputedObject, 'getInfo')
+    wrap(ee_module.Image, 'getMapId')
+    wrap(ee_module.Image, 'getThumbURL')
+
+    def restore():
+        for cls, name, original in originals:
+            setattr(cls, name, original)
+    restore.recording = recording
+    return restore
@@ -0,0 +1,135 @@
+import numpy as np
+
+# Local NumPy versions of RadGEEToolbox computations, for pixel arrays pulled out of Earth Engine (sampleRectangle,
+# exported GeoTIFFs). Masked pixels are represented as NaN in float32 outputs.
+
+# (first band, second band) of each normalized difference index, as used by the *_fn functions in RadGEEToolbox
+LANDSAT_INDEX_BANDS = {'ndwi': ('SR_B3', 'SR_B5'), 'ndvi': ('SR_B5', 'SR_B4'), 'halite': ('SR_B4', 'SR_B6'), 'gypsum': ('SR_B6', 'SR_B7')}
+SENTINEL2_INDEX_BANDS = {'ndwi': ('B3', 'B8'), 'ndvi': ('B8', 'B4'), 'halite': ('B4', 'B11'), 'gypsum': ('B11', 'B12')}
+INDEX_BANDS = {'landsat': LANDSAT_INDEX_BANDS, 'sentinel2': SENTINEL2_INDEX_BANDS}
+
+def _band(bands, band_names, name):
+    # bands is either a mapping of band name -> 2-D array, or a stacked (band, row, col) array ordered like band_names
+    if band_names is None:
+        return bands[name]
+    return bands[band_names.index(name)]
+
+def normalized_difference(first, second, threshold=None, out=None, scratch=None, mask=None):
+    # (first - second) / (first + second) with the semantics of ee.Image.normalizedDifference: pixels where either input
+    # is negative or masked (NaN) are masked, and a zero sum gives 0. With a threshold, pixels below it are masked as
+    # well, like the updateMask(index.gte(threshold)) of the *_fn functions. out (float32), scratch (float32) and mask
+    # (bool) are optional preallocated buffers of the image shape; nothing else is allocated
+    shape = np.shape(first)
+    out = np.empty(shape, np.float32) if out is None else out
+    scratch = np.empty(shape, np.float32) if scratch is None else scratch
+    mask = np.empty(shape, bool) if mask is None else mask
+    np.add(first, second, out=scratch, dtype=np.float32)
+    np.subtract(first, second, out=out, dtype=np.float32)
+    np.not_equal(scratch, 0, out=mask)
+    np.divide(out, scratch, out=out, where=mask)  # zero sums keep the (zero) numerator
+    np.minimum(first, second, out=scratch, dtype=np.float32)
+    np.less(scratch, 0, out=mask)
+    out[mask] = np.nan
+    if threshold is not None:
+        np.less(out, threshold, out=mask)
+        out[mask] = np.nan
+    return out
+
+def spectral_indices(bands, band_names=None, sensor='landsat', indices=('ndwi', 'ndvi', 'halite', 'gypsum'), thresholds=None, out=None):
+    # Computes several indices from one band stack in a single pass, writing each into a slice of one preallocated
+    # (index, row, col) float32 array and reusing the same scratch buffers for every index. thresholds maps index name
+    # to threshold and defaults to -1 for every index, like the toolbox collections. Returns (out, index band names)
+    index_bands = INDEX_BANDS[sensor]
+    thresholds = thresholds or {}
+    shape = np.shape(_band(bands, band_names, index_bands[indices[0]][0]))
+    out = np.empty((len(indices),) + shape, np.float32) if out is None else out
+    scratch = np.empty(shape, np.float32)
+    mask = np.empty(shape, bool)
+    for i, name in enumerate(indices):
+        first, second = index_bands[name]
+        normalized_difference(_band(bands, band_names, first), _band(bands, band_names, second), thresholds.get(name, -1), out=out[i], scratch=scratch, mask=mask)
+    return out, list(indices)
+
+def spectral_index(bands, name, band_names=None, sensor='landsat', threshold=-1):
+    # Single index, equivalent to e.g. LandsatCollection.landsat_ndwi_fn(image, threshold) for name='ndwi'
+    first, second = INDEX_BANDS[sensor][name]
+    return normalized_difference(_band(bands, band_names, first), _band(bands, band_names, second), threshold)
+
+# Constants of LandsatCollection.landsat_LST (Landsat 8 TIRS band 10)
+LST_K1 = 774.89
+LST_K2 = 1321.08
+LST_BANDS = ['ST_ATRAN', 'ST_EMIS', 'ST_DRAD', 'ST_TRAD', 'ST_URAD']
+
+def landsat_lst(bands, band_names=None, out=None, block_rows=512):
+    # Land surface temperature (C) computed like LandsatCollection.temperature_bands + landsat_LST (Sekertekin &
+    # Bonafoni 2020) from the raw ST_ATRAN, ST_EMIS, ST_DRAD, ST_TRAD and ST_URAD bands. Rows are processed block_rows at
+    # a time with in-place operations on a few block-sized scratch buffers, so memory use beyond the inputs and output is
+    # bounded even for full WRS scenes. Inputs and out may be np.memmap (or any array-like supporting 2-D slicing), so
+    # scenes don't have to fit in memory. Pixels where the formula isn't finite (e.g. zero nodata fill) are NaN
+    atran, emis, drad, trad, urad = (_band(bands, band_names, name) for name in LST_BANDS)
+    rows, cols = np.shape(atran)
+    out = np.empty((rows, cols), np.float32) if out is None else out
+    t, e, c, x = (np.empty((min(block_rows, rows), cols), np.float64) for _ in range(4))
+    mask = np.empty((min(block_rows, rows), cols), bool)
+    with np.errstate(all='ignore'):
+        for start in range(0, rows, block_rows):
+            stop = min(start + block_rows, rows)
+            n = stop - start
+            bt, be, bc, bx, bm = t[:n], e[:n], c[:n], x[:n], mask[:n]
+            np.multiply(atran[start:stop], 0.0001, out=bt)  # transmittance
+            np.multiply(emis[start:stop], 0.0001, out=be)  # emissivity
+            # transmittance * (1 - emissivity) * downwelling
+            np.subtract(1, be, out=bc)
+            bc *= bt
+            bc *= drad[start:stop]
+            bc *= 0.001
+            # (B10_rad - upwelling - transmittance*(1 - emissivity)*downwelling) / (transmittance*emissivity)
+            np.subtract(trad[start:stop], urad[start:stop], out=bx, dtype=np.float64)
+            bx *= 0.001
+            bx -= bc
+            bt *= be
+            bx /= bt
+            # k2 / log(k1/x + 1) - 273.15
+            np.divide(LST_K1, bx, out=bx)
+            bx += 1
+            np.log(bx, out=bx)
+            np.divide(LST_K2, bx, out=bx)
+            bx -= 273.15
+            np.isfinite(bx, out=bm)
+            np.logical_not(bm, out=bm)
+            bx[bm] = np.nan
+            out[start:stop] = bx
+    return out
+
+def _landsat_lst_scene(scene, block_rows):
+    bands = {name: np.load(scene[name], mmap_mode='r') for name in LST_BANDS}
+    out = np.lib.format.open_memmap(scene['out'], mode='w+', dtype=np.float32, shape=np.shape(bands['ST_ATRAN']))
+    landsat_lst(bands, out=out, block_rows=block_rows)
+    out.flush()
+    return scene['out']
+
+def landsat_lst_scenes(scenes, max_workers=None, block_rows=512):
+    # Runs landsat_lst over several scenes in parallel worker processes (one scene per process, each memory-mapped).
+    # Every scene is a dict of ST_* band name -> .npy path plus 'out' -> .npy path for the result. Returns the out paths
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_landsat_lst_scene, scenes, [block_rows] * len(scenes)))
+
+def otsu_threshold(histogram, bucket_means=None):
+    # Client-side equivalent of LandsatCollection.OtsuThreshold for a fetched histogram: either the ee.Reducer.histogram()
+    # dictionary ({'histogram': [...], 'bucketMeans': [...]}) or the counts with bucket_means. O(n) cumulative-sum
+    # formulation; divisions by zero give 0 and ties resolve to the last bucket, as on the server
+    if bucket_means is None:
+        histogram, bucket_means = histogram['histogram'], histogram['bucketMeans']
+    counts = np.asarray(histogram, np.float64)
+    means = np.asarray(bucket_means, np.float64)
+    total = counts.sum()
+    weighted = means * counts
+    mean = weighted.sum() / total if total else 0.0
+    a_counts = np.cumsum(counts)
+    a_sums = np.cumsum(weighted)
+    b_counts = total - a_counts
+    a_means = np.divide(a_sums, a_counts, out=np.zeros_like(a_sums), where=a_counts != 0)
+    b_means = np.divide(weighted.sum() - a_sums, b_counts, out=np.zeros_like(a_sums), where=b_counts != 0)
+    bss = a_counts * (a_means - mean) ** 2 + b_counts * (b_means - mean) ** 2
+    return float(means[np.argsort(bss, kind='stable')[-1]])
@@ -0,0 +1,179 @@
+import json
+import math
+import os
+from functools import lru_cache
+
+# Data-driven region registry for the apps: named regions (map center, WRS-2 path/rows and MGRS tiles) are loaded from a
+# bundled JSON file, and a grid index over Landsat WRS-2 scene and Sentinel-2 MGRS tile footprints resolves any point or
+# bounding box to the tiles covering it. Footprints are computed from the nominal WRS-2 orbit and the UTM/MGRS grid, so
+# they are approximate (within a few km) - good for choosing tiles, not for clipping
+
+DEFAULT_REGIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'utah_regions.json')
+
+# WGS84
+_A = 6378137.0
+_E2 = 0.00669438
+_EARTH_RADIUS_KM = 6371.0
+
+# Nominal WRS-2 orbit: 233 paths, 248 rows, row 60 at the descending node, path 1 crossing the equator at 64.60 W
+_WRS2_INCLINATION = math.radians(98.2)
+_WRS2_PERIOD_MIN = 98.884
+_EARTH_ROTATION_DEG_PER_MIN = 360.0 / 1436.068
+_WRS2_SCENE_HALF_LENGTH_KM = 90.0
+_WRS2_SCENE_HALF_WIDTH_KM = 92.5
+
+def _geocentric_to_geodetic(lat):
+    return math.degrees(math.atan(math.tan(math.radians(lat)) / (1 - _E2)))
+
+def _wrs2_track_point(path, row):
+    # Ground track position (geocentric lat, lon) of the nominal orbit at a fractional row
+    theta = math.radians((60 - row) * 360.0 / 248)  # along-track angle before the descending node
+    lat = math.degrees(math.asin(math.sin(theta) * math.sin(_WRS2_INCLINATION)))
+    inertial = math.degrees(math.atan2(-math.cos(_WRS2_INCLINATION) * math.sin(theta), math.cos(theta)))
+    earth_rotation = (60 - row) / 248.0 * _WRS2_PERIOD_MIN * _EARTH_ROTATION_DEG_PER_MIN
+    node = -64.60 - (path - 1) * 360.0 / 233
+    lon = (node + inertial + earth_rotation + 180) % 360 - 180
+    return lat, lon
+
+def _destination(lat, lon, bearing, distance_km):
+    lat, lon, bearing = math.radians(lat), math.radians(lon), math.radians(bearing)
+    d = distance_km / _EARTH_RADIUS_KM
+    lat2 = math.asin(math.sin(lat) * math.cos(d) + math.cos(lat) * math.sin(d) * math.cos(bearing))
+    lon2 = lon + math.atan2(math.sin(bearing) * math.sin(d) * math.cos(lat), math.cos(d) - math.sin(lat) * math.sin(lat2))
+    return math.degrees(lat2), math.degrees(lon2)
+
+def _bearing(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    y = math.sin(lon2 - lon1) * math.cos(lat2)
+    x = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(lon2 - lon1)
+    return math.degrees(math.atan2(y, x))
+
+def wrs2_footprint(path, row):
+    # Approximate (lon, lat) corners of a WRS-2 scene, from the scene center and the local ground track heading
+    half_row = _WRS2_SCENE_HALF_LENGTH_KM / (2 * math.pi * _EARTH_RADIUS_KM) * 248
+    corners = []
+    for end, side in [(-1, -1), (-1, 1), (1, 1), (1, -1)]:
+        lat, lon = _wrs2_track_point(path, row + end * half_row)
+        heading = _bearing(*_wrs2_track_point(path, row - half_row), *_wrs2_track_point(path, row + half_row))
+        lat, lon = _destination(lat, lon, heading + side * 90, _WRS2_SCENE_HALF_WIDTH_KM)
+        corners.append((lon, _geocentric_to_geodetic(lat)))
+    return corners
+
+def _utm_to_latlon(zone, easting, northing):
+    # Inverse transverse Mercator (Snyder 1987) on WGS84, northern hemisphere
+    k0 = 0.9996
+    ep2 = _E2 / (1 - _E2)
+    x = easting - 500000.0
+    m = northing / k0
+    mu = m / (_A * (1 - _E2 / 4 - 3 * _E2 ** 2 / 64 - 5 * _E2 ** 3 / 256))
+    e1 = (1 - math.sqrt(1 - _E2)) / (1 + math.sqrt(1 - _E2))
+    phi1 = (mu + (3 * e1 / 2 - 27 * e1 ** 3 / 32) * math.sin(2 * mu) + (21 * e1 ** 2 / 16 - 55 * e1 ** 4 / 32) * math.sin(4 * mu)
+            + (151 * e1 ** 3 / 96) * math.sin(6 * mu) + (1097 * e1 ** 4 / 512) * math.sin(8 * mu))
+    n1 = _A / math.sqrt(1 - _E2 * math.sin(phi1) ** 2)
+    t1 = math.tan(phi1) ** 2
+    c1 = ep2 * math.cos(phi1) ** 2
+    r1 = _A * (1 - _E2) / (1 - _E2 * math.sin(phi1) ** 2) ** 1.5
+    d = x / (n1 * k0)
+    lat = phi1 - (n1 * math.tan(phi1) / r1) * (d ** 2 / 2 - (5 + 3 * t1 + 10 * c1 - 4 * c1 ** 2 - 9 * ep2) * d ** 4 / 24
+                                              + (61 + 90 * t1 + 298 * c1 + 45 * t1 ** 2 - 252 * ep2 - 3 * c1 ** 2) * d ** 6 / 720)
+    lon = (d - (1 + 2 * t1 + c1) * d ** 3 / 6 + (5 - 2 * c1 + 28 * t1 - 3 * c1 ** 2 + 8 * ep2 + 24 * t1 ** 2) * d ** 5 / 120) / math.cos(phi1)
+    return math.degrees(lat), (zone - 1) * 6 - 180 + 3 + math.degrees(lon)
+
+_MGRS_COLUMN_LETTERS = ['ABCDEFGH', 'JKLMNPQR', 'STUVWXYZ']
+_MGRS_ROW_LETTERS = 'ABCDEFGHJKLMNPQRSTUV'
+_MGRS_BAND_LETTERS = 'CDEFGHJKLMNPQRSTUVWX'  # 8 degree latitude bands from 80 S
+_S2_TILE_SIZE_M = 109800.0
+
+def mgrs_tiles(zone, lat_min, lat_max):
+    # Sentinel-2 MGRS tiles ({id: (lon, lat) corners}) of a UTM zone between two latitudes (northern hemisphere). Tiles
+    # are 109.8 km squares anchored on the 100 km MGRS grid; squares crossing a latitude band edge exist in both bands
+    tiles = {}
+    columns = _MGRS_COLUMN_LETTERS[(zone - 1) % 3]
+    row_offset = 5 if zone % 2 == 0 else 0
+    for band_index in range(int((lat_min + 80) // 8), int((lat_max + 80) // 8) + 1):
+        band_south, band_north = band_index * 8 - 80, band_index * 8 - 72
+        for column in range(1, 9):
+            for block in range(int(band_south * 1.1) - 2, int(band_north * 1.12) + 2):
+                # band membership from the 100 km square itself, not the overlapping 109.8 km tile
+                square_lats = [_utm_to_latlon(zone, column * 100000.0 + dx, block * 100000.0 + dy)[0]
+                               for dx in (0, 100000.0) for dy in (0, 100000.0)]
+                if max(square_lats) <= max(band_south, lat_min) or min(square_lats) >= min(band_north, lat_max):
+                    continue
+                corners = [_utm_to_latlon(zone, column * 100000.0 + dx, block * 100000.0 + dy)[::-1]
+                           for dx, dy in [(0, 0), (_S2_TILE_SIZE_M, 0), (_S2_TILE_SIZE_M, _S2_TILE_SIZE_M), (0, _S2_TILE_SIZE_M)]]
+                tile_id = f'{zone}{_MGRS_BAND_LETTERS[band_index]}{columns[column - 1]}{_MGRS_ROW_LETTERS[(block + row_offset) % 20]}'
+                tiles[tile_id] = corners
+    return tiles
+
+def _point_in_polygon(lon, lat, corners):
+    inside = False
+    for (x1, y1), (x2, y2) in zip(corners, corners[1:] + corners[:1]):
+        if (y1 > lat) != (y2 > lat) and lon < x1 + (lat - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+class RegionRegistry:
+    cell_size = 1.0  # degrees, grid index cell size
+
+    def __init__(self, regions, footprints):
+        # regions: list of region dicts (name, lat, long, path, row_N, row_S, tile_N, tile_S, ...)
+        # footprints: {('wrs2', (path, row)) or ('mgrs', tile id): (lon, lat) corners}
+        self.regions = {region['name']: region for region in regions}
+        self.footprints = footprints
+        self._grid = {}
+        for key, corners in footprints.items():
+            lons, lats = [lon for lon, _ in corners], [lat for _, lat in corners]
+            for cell_x in range(math.floor(min(lons) / self.cell_size), math.floor(max(lons) / self.cell_size) + 1):
+                for cell_y in range(math.floor(min(lats) / self.cell_size), math.floor(max(lats) / self.cell_size) + 1):
+                    self._grid.setdefault((cell_x, cell_y), []).append(key)
+
+    @classmethod
+    def load(cls, path=DEFAULT_REGIONS_PATH):
+        # Regions and tile coverage from a JSON file, see utah_regions.json
+        with open(path) as f:
+            data = json.load(f)
+        coverage = data['coverage']
+        footprints = {}
+        for path_number in range(coverage['wrs2_paths'][0], coverage['wrs2_paths'][1] + 1):
+            for row in range(coverage['wrs2_rows'][0], coverage['wrs2_rows'][1] + 1):
+                footprints[('wrs2', (path_number, row))] = wrs2_footprint(path_number, row)
+        for zone in coverage['mgrs_zones']:
+            for tile_id, corners in mgrs_tiles(zone, *coverage['mgrs_latitudes']).items():
+                footprints[('mgrs', tile_id)] = corners
+        return cls(data['regions'], footprints)
+
+    def names(self):
+        return list(self.regions)
+
+    def get(self, name):
+        return self.regions[name]
+
+    def _candidates(self, west, south, east, north):
+        keys = set()
+        for cell_x in range(math.floor(west / self.cell_size), math.floor(east / self.cell_size) + 1):
+            for cell_y in range(math.floor(south / self.cell_size), math.floor(north / self.cell_size) + 1):
+                keys.update(self._grid.get((cell_x, cell_y), ()))
+        return keys
+
+    @staticmethod
+    def _grouped(keys):
+        return {'wrs2': sorted(tile for kind, tile in keys if kind == 'wrs2'), 'mgrs': sorted(tile for kind, tile in keys if kind == 'mgrs')}
+
+    def tiles_for_point(self, lat, lon):
+        # {'wrs2': [(path, row), ...], 'mgrs': [tile id, ...]} of the footprints containing the point
+        keys = [key for key in self._candidates(lon, lat, lon, lat) if _point_in_polygon(lon, lat, self.footprints[key])]
+        return self._grouped(keys)
+
+    def tiles_for_bbox(self, west, south, east, north):
+        # Footprints whose bounding box intersects the given bounding box (e.g. of a user-drawn AOI)
+        keys = []
+        for key in self._candidates(west, south, east, north):
+            lons, lats = [lon for lon, _ in self.footprints[key]], [lat for _, lat in self.footprints[key]]
+            if min(lons) <= east and max(lons) >= west and min(lats) <= north and max(lats) >= south:
+                keys.append(key)
+        return self._grouped(keys)
+
+@lru_cache(maxsize=None)
+def default_registry(path=DEFAULT_REGIONS_PATH):
+    # Loaded once per process, so app reruns reuse the registry and its index
+    return RegionRegistry.load(path)
@@ -1,7 +1,34 @@
-import geemap
 import ee
-# ee.Initialize()
-geemap.ee_initialize()
+import threading
+
+_initialized = False
+_initialize_lock = threading.Lock()
+
+def _is_credentials_error(error):
+    # What ee.Initialize raises when no stored credentials are found ("Please authorize access to your Earth Engine
+    # account by running `earthengine authenticate`...")
+    message = str(error).lower()
+    return isinstance(error, ee.EEException) and ('authenticate' in message or 'credentials' in message)
+
+def initialize(**kwargs):
+    # Idempotent Earth Engine initialization, triggered automatically by the first collection built or evaluated.
+    # Call it explicitly to pass ee.Initialize arguments (e.g. project=...). Falls back to the interactive
+    # ee.Authenticate() only when no stored credentials are found and only on the main thread; any other error (network,
+    # quota, project), or a missing credential on a worker or timer thread, is raised instead
+    global _initialized
+    if _initialized:
+        return
+    with _initialize_lock:
+        if _initialized:
+            return
+        try:
+            ee.Initialize(**kwargs)
+        except Exception as e:
+            if not (_is_credentials_error(e) and threading.current_thread() is threading.main_thread()):
+                raise
+            ee.Authenticate()
+            ee.Initialize(**kwargs)
+        _initialized = True
 
 class LandsatCollection:
     def __init__(self, start_date=None, end_date=None, tile_row=None, tile_path=None, cloud_percentage_threshold=None, collection=None):
@@ -199,6 +226,7 @@ class LandsatCollection:
         return image.set(band_name, stats.get(band_name))
 
     def get_filtered_collection(self):
+        initialize()
         landsat8 = ee.ImageCollection("LANDSAT/LC08/C02/T1_L2")
         landsat9 = ee.ImageCollection("LANDSAT/LC09/C02/T1_L2")
         landsat5 = ee.ImageCollection("LANDSAT/LT05/C02/T1_L2").map(LandsatCollection.landsat5bandrename)  # Replace with the correct Landsat 5 collection ID
@@ -387,6 +415,7 @@ class Sentinel2Collection:
         return image.set(band_name, stats.get(band_name)) #calculates and returns summed pixel area as image property titled the same as the band name of the band used for calculation
     
     def get_filtered_collection(self):
+        initialize()
         sentinel2 = ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED")
         filtered_collection = sentinel2.filterDate(self.start_date, self.end_date).filter(ee.Filter.inList('MGRS_TILE', [self.tile])).filter(ee.Filter.lte('NODATA_PIXEL_PERCENTAGE', self.nodata_threshold)) \
                                                         .filter(ee.Filter.lte('CLOUDY_PIXEL_PERCENTAGE', self.cloud_percentage_threshold)).map(Sentinel2Collection.image_dater).sort('Date_Filter')
@@ -1,11 +1,64 @@
-import geemap
 import ee
-# ee.Initialize()
-geemap.ee_initialize()
+import contextvars
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import cached_property
 
 #Version 1.0.2 - changes made to eliminate client side processing and keep all processing on server-side
 
+_initialized = False
+_initialize_lock = threading.Lock()
+
+def _is_credentials_error(error):
+    # What ee.Initialize raises when no stored credentials are found ("Please authorize access to your Earth Engine
+    # account by running `earthengine authenticate`...")
+    message = str(error).lower()
+    return isinstance(error, ee.EEException) and ('authenticate' in message or 'credentials' in message)
+
+def initialize(**kwargs):
+    # Idempotent Earth Engine initialization, triggered automatically by the first collection built or evaluated.
+    # Call it explicitly to pass ee.Initialize arguments (e.g. project=...). Falls back to the interactive
+    # ee.Authenticate() only when no stored credentials are found and only on the main thread; any other error (network,
+    # quota, project), or a missing credential on a worker or timer thread, is raised instead
+    global _initialized
+    if _initialized:
+        return
+    with _initialize_lock:
+        if _initialized:
+            return
+        try:
+            ee.Initialize(**kwargs)
+        except Exception as e:
+            if not (_is_credentials_error(e) and threading.current_thread() is threading.main_thread()):
+                raise
+            ee.Authenticate()
+            ee.Initialize(**kwargs)
+        _initialized = True
+
+def get_info(obj, cache=None):
+    # Every client-server evaluation made by the toolbox goes through here. With a ResultCache, results of previously
+    # evaluated expressions are served from disk instead
+    if cache is not None:
+        return cache.get_info(obj)
+    initialize()
+    return instrumentation.call('getInfo', obj, obj.getInfo)
+
 class LandsatCollection:
+    metadata_properties = ['Date_Filter', 'system:time_start', 'SPACECRAFT_ID', 'CLOUD_COVER', 'WRS_PATH', 'WRS_ROW']
+    index_names = ['ndwi', 'ndvi', 'halite', 'gypsum', 'LST']  # supported by indices_collection
+    ndwi_threshold = -1
+    ndvi_threshold = -1
+    halite_threshold = -1
+    gypsum_threshold = -1
+
     def __init__(self, start_date=None, end_date=None, tile_row=None, tile_path=None, cloud_percentage_threshold=None, collection=None):
         if collection is None and (start_date is None or end_date is None or tile_row is None or tile_path is None or cloud_percentage_threshold is None):
             raise ValueError("Either provide all required fields (start_date, end_date, tile_row, tile_path, cloud_percentage_threshold) or provide a collection.")
@@ -22,48 +75,52 @@ class LandsatCollection:
             self.collection = collection
 
         self.dates_list = self.list_of_dates()
-        self.dates = self.dates_list.getInfo()
-        self.ndwi_threshold = -1
-        self.ndvi_threshold = -1
-        self.halite_threshold = -1
-        self.gypsum_threshold = -1
-        self.masked_clouds_collection = self.masked_clouds_collection()
+        self._dates = None  # client-side dates are only fetched when first used, see the dates property
+        self._metadata = None
+        self._metadata_by_date = None
+        self._otsu_thresholds = {}
 
-        # Check if the required bands are available
-        first_image = self.collection.first()
-        available_bands = first_image.bandNames()
+    # Derived sub-collections are only built the first time they are accessed, so constructing (and stitching)
+    # collections doesn't pay for index collections the caller never uses
+    @cached_property
+    def masked_clouds_collection(self):
+        col = self.collection.map(LandsatCollection.maskL8clouds)
+        return LandsatSubCollection(col, self.dates_list, self)
 
+    @cached_property
+    def ndwi(self):
+        available_bands = self.collection.first().bandNames()
         if available_bands.contains('SR_B3') and available_bands.contains('SR_B5'):
-            self.ndwi = self.ndwi_collection(self.ndwi_threshold)
-        else:
-            self.ndwi = None
-            raise ValueError("Insufficient Bands for ndwi calculation")
-        
+            return self.ndwi_collection(self.ndwi_threshold)
+        raise ValueError("Insufficient Bands for ndwi calculation")
+
+    @cached_property
+    def ndvi(self):
+        available_bands = self.collection.first().bandNames()
         if available_bands.contains('SR_B4') and available_bands.contains('SR_B5'):
-            self.ndvi = self.ndvi_collection(self.ndvi_threshold)
-        else:
-            self.ndvi = None
-            raise ValueError("Insufficient Bands for ndwi calculation")
+            return self.ndvi_collection(self.ndvi_threshold)
+        raise ValueError("Insufficient Bands for ndvi calculation")
 
+    @cached_property
+    def halite(self):
+        available_bands = self.collection.first().bandNames()
         if available_bands.contains('SR_B4') and available_bands.contains('SR_B6'):
-            self.halite = self.halite_collection(self.halite_threshold)
-        else:
-            self.halite = None
-            raise ValueError("Insufficient Bands for halite calculation")
+            return self.halite_collection(self.halite_threshold)
+        raise ValueError("Insufficient Bands for halite calculation")
 
+    @cached_property
+    def gypsum(self):
+        available_bands = self.collection.first().bandNames()
         if available_bands.contains('SR_B6') and available_bands.contains('SR_B7'):
-            self.gypsum = self.gypsum_collection(self.gypsum_threshold)
-        else:
-            self.gypsum = None
-            raise ValueError("Insufficient Bands for gypsum calculation")
+            return self.gypsum_collection(self.gypsum_threshold)
+        raise ValueError("Insufficient Bands for gypsum calculation")
 
+    @cached_property
+    def LST(self):
+        available_bands = self.collection.first().bandNames()
         if available_bands.contains('ST_ATRAN') and available_bands.contains('ST_EMIS') and available_bands.contains('ST_DRAD') and available_bands.contains('ST_TRAD') and available_bands.contains('ST_URAD') :
-            self.LST = self.surface_temperature_collection()
-        else:
-            self.LST = None
-            raise ValueError("Insufficient Bands for temperature calculation")
-
-
+            return self.surface_temperature_collection()
+        raise ValueError("Insufficient Bands for temperature calculation")
 
     @staticmethod
     def image_dater(image):
@@ -97,6 +154,20 @@ class LandsatCollection:
         gypsum_index = image.normalizedDifference(['SR_B6', 'SR_B7'])
         gypsum = gypsum_index.updateMask(gypsum_index.gte(threshold)).rename('gypsum').copyProperties(image)
         return gypsum
+
+    @staticmethod
+    def landsat_indices_fn(image, indices, thresholds):
+        # One image with a band per index (named like the single-index collections, each with its own threshold mask)
+        # and the properties of image, so all indices are computed from a single read of the scene
+        index_fns = {'ndwi': LandsatCollection.landsat_ndwi_fn, 'ndvi': LandsatCollection.landsat_ndvi_fn,
+                     'halite': LandsatCollection.landsat_halite_fn, 'gypsum': LandsatCollection.landsat_gypsum_fn}
+        bands = []
+        for name in indices:
+            if name == 'LST':
+                bands.append(LandsatCollection.landsat_LST(LandsatCollection.temperature_bands(image)).select('LST'))
+            else:
+                bands.append(index_fns[name](image, thresholds[name]))
+        return ee.Image.cat(bands).copyProperties(image)
     
     @staticmethod
     def MaskWaterLandsat(image):
@@ -157,41 +228,85 @@ class LandsatCollection:
         return image.set(band_name, stats.get(band_name))
 
     @staticmethod
-    def dNDWIPixelAreaSum(image, geometry, band_name='ndwi', scale=30, maxPixels=1e12):
-        def OtsuThreshold(histogram):
-            counts = ee.Array(ee.Dictionary(histogram).get('histogram'))
-            means = ee.Array(ee.Dictionary(histogram).get('bucketMeans'))
-            size = means.length().get([0])
-            total = counts.reduce(ee.Reducer.sum(), [0]).get([0])
-            sum = means.multiply(counts).reduce(ee.Reducer.sum(), [0]).get([0])
-            mean = sum.divide(total)
-            indices = ee.List.sequence(1, size)
-
-            def func_xxx(i):
-                aCounts = counts.slice(0, 0, i)
-                aCount = aCounts.reduce(ee.Reducer.sum(), [0]).get([0])
-                aMeans = means.slice(0, 0, i)
-                aMean = (
-                    aMeans.multiply(aCounts)
-                    .reduce(ee.Reducer.sum(), [0])
-                    .get([0])
-                    .divide(aCount)
-                )
-                bCount = total.subtract(aCount)
-                bMean = sum.subtract(aCount.multiply(aMean)).divide(bCount)
-                return aCount.multiply(aMean.subtract(mean).pow(2)).add(
-                    bCount.multiply(bMean.subtract(mean).pow(2)))
-
-            bss = indices.map(func_xxx)
-            return means.sort(bss).get([-1])
-        # band_name = image.getInfo()['bands'][0]['id']
+    def PixelAreaSums(image, band_names, geometry, threshold=-1, scale=30, maxPixels=1e12):
+        # PixelAreaSum of several bands (e.g. of an indices_collection image) at once: the masked pixel areas are stacked
+        # into one image and summed by a single reduceRegion, each area set as a property named after its band.
+        # threshold is a number or a {band_name: threshold} dictionary
+        thresholds = threshold if isinstance(threshold, dict) else {band_name: threshold for band_name in band_names}
         area_image = ee.Image.pixelArea()
+        areas = ee.Image.cat([area_image.updateMask(image.select(band_name).gte(thresholds.get(band_name, -1))).rename(band_name) for band_name in band_names])
+        stats = areas.reduceRegion(
+            reducer = ee.Reducer.sum(),
+            geometry= geometry,
+            scale=scale,
+            maxPixels = maxPixels)
+        return image.set(stats)
+
+    @staticmethod
+    def OtsuThreshold(histogram, method='cumulative'):
+        # Otsu threshold of an ee.Reducer.histogram() output: the bucket mean maximizing the between-class variance.
+        # 'cumulative' evaluates every split at once from running sums (ee.Array.accumulate), a constant-size graph with
+        # O(n) work; 'iterative' is the original formulation that slices and reduces the histogram once per bucket
+        counts = ee.Array(ee.Dictionary(histogram).get('histogram'))
+        means = ee.Array(ee.Dictionary(histogram).get('bucketMeans'))
+        size = means.length().get([0])
+        total = counts.reduce(ee.Reducer.sum(), [0]).get([0])
+        sum = means.multiply(counts).reduce(ee.Reducer.sum(), [0]).get([0])
+        mean = sum.divide(total)
+
+        if method == 'cumulative':
+            aCounts = counts.accumulate(0)
+            aSums = means.multiply(counts).accumulate(0)
+            aMeans = aSums.divide(aCounts)
+            bCounts = aCounts.multiply(-1).add(total)
+            bMeans = aSums.multiply(-1).add(sum).divide(bCounts)
+            bss = aCounts.multiply(aMeans.subtract(mean).pow(2)).add(bCounts.multiply(bMeans.subtract(mean).pow(2)))
+            return means.sort(bss).get([-1])
+        if method != 'iterative':
+            raise ValueError("Invalid value for 'method'. Must be 'cumulative' or 'iterative'.")
+
+        indices = ee.List.sequence(1, size)
+
+        def func_xxx(i):
+            aCounts = counts.slice(0, 0, i)
+            aCount = aCounts.reduce(ee.Reducer.sum(), [0]).get([0])
+            aMeans = means.slice(0, 0, i)
+            aMean = (
+                aMeans.multiply(aCounts)
+                .reduce(ee.Reducer.sum(), [0])
+                .get([0])
+                .divide(aCount)
+            )
+            bCount = total.subtract(aCount)
+            bMean = sum.subtract(aCount.multiply(aMean)).divide(bCount)
+            return aCount.multiply(aMean.subtract(mean).pow(2)).add(
+                bCount.multiply(bMean.subtract(mean).pow(2)))
+
+        bss = indices.map(func_xxx)
+        return means.sort(bss).get([-1])
+
+    @staticmethod
+    def ImageOtsuThreshold(image, band_name, histogram_geometry, scale=30, otsu_method='cumulative'):
+        # Otsu threshold of band_name from a 255-bucket histogram over histogram_geometry (the geometry buffered by 6 km
+        # in dNDWIPixelAreaSum)
         histogram = image.select(band_name).reduceRegion(
             reducer = ee.Reducer.histogram(255, 2),
-            geometry = geometry.geometry().buffer(6000),
+            geometry = histogram_geometry,
             scale = scale,
             bestEffort= True,)
-        threshold = OtsuThreshold(histogram.get(band_name)).add(0.15) #was standard for last export #.add(0.15) removing threshold offset to ensure all water pixels are included for cyanobacteria detection
+        return LandsatCollection.OtsuThreshold(histogram.get(band_name), otsu_method)
+
+    @staticmethod
+    def dNDWIPixelAreaSum(image, geometry, band_name='ndwi', scale=30, maxPixels=1e12, otsu_method='cumulative', threshold=None, histogram_geometry=None):
+        # threshold: a precomputed Otsu threshold (see otsu_thresholds) to skip the histogram, the 0.15 offset is still added.
+        # histogram_geometry: the buffered geometry, so it can be built once when mapping over a collection
+        # band_name = image.getInfo()['bands'][0]['id']
+        area_image = ee.Image.pixelArea()
+        if threshold is None:
+            if histogram_geometry is None:
+                histogram_geometry = geometry.geometry().buffer(6000)
+            threshold = LandsatCollection.ImageOtsuThreshold(image, band_name, histogram_geometry, scale, otsu_method)
+        threshold = ee.Number(threshold).add(0.15) #was standard for last export #.add(0.15) removing threshold offset to ensure all water pixels are included for cyanobacteria detection
         mask = image.select(band_name).gte(threshold)
         final = image.addBands(area_image)
         stats = final.select('area').updateMask(mask).rename(band_name).reduceRegion(
@@ -201,46 +316,175 @@ class LandsatCollection:
             maxPixels = maxPixels)
         return image.set(band_name, stats.get(band_name))
 
-    def get_filtered_collection(self):
+    @staticmethod
+    def merged_landsat_collection():
         landsat8 = ee.ImageCollection("LANDSAT/LC08/C02/T1_L2")
         landsat9 = ee.ImageCollection("LANDSAT/LC09/C02/T1_L2")
         landsat5 = ee.ImageCollection("LANDSAT/LT05/C02/T1_L2").map(LandsatCollection.landsat5bandrename)  # Replace with the correct Landsat 5 collection ID
-        filtered_collection = landsat8.merge(landsat9).merge(landsat5).filterDate(self.start_date, self.end_date).filter(ee.Filter.And(ee.Filter.eq('WRS_PATH', self.tile_path),
+        return landsat8.merge(landsat9).merge(landsat5)
+
+    def get_filtered_collection(self):
+        initialize()
+        filtered_collection = LandsatCollection.merged_landsat_collection().filterDate(self.start_date, self.end_date).filter(ee.Filter.And(ee.Filter.eq('WRS_PATH', self.tile_path),
                                 ee.Filter.eq('WRS_ROW', self.tile_row))).filter(ee.Filter.lte('CLOUD_COVER', self.cloud_percentage_threshold)).map(LandsatCollection.image_dater).sort('Date_Filter')
         return filtered_collection
+
+    @classmethod
+    def mosaic_by_date(cls, start_date, end_date, tiles, cloud_percentage_threshold, require_all_tiles=False):
+        # One collection mosaicking any number of WRS (path, row) tiles per Date_Filter, e.g. tiles=[(38, 31), (38, 32), (39, 31)].
+        # All tiles are filtered together and grouped by date in a single server-side pass, instead of chaining pairwise
+        # CollectionStitch calls. With require_all_tiles=True only dates on which every tile has an image are kept
+        initialize()
+        tile_filter = ee.Filter.Or(*[ee.Filter.And(ee.Filter.eq('WRS_PATH', path), ee.Filter.eq('WRS_ROW', row)) for path, row in tiles])
+        filtered_collection = LandsatCollection.merged_landsat_collection().filterDate(start_date, end_date).filter(tile_filter) \
+                                .filter(ee.Filter.lte('CLOUD_COVER', cloud_percentage_threshold)).map(LandsatCollection.image_dater).sort('Date_Filter')
+        min_tiles = len(tiles) if require_all_tiles else 1
+        return cls(collection=mosaic_tiles_by_date(filtered_collection, ['WRS_PATH', 'WRS_ROW'], min_tiles))
     
     def ndwi_collection(self, threshold):
         col = self.collection.map(lambda image: LandsatCollection.landsat_ndwi_fn(image, threshold=self.ndwi_threshold))
-        return LandsatSubCollection(col, self.dates_list)
+        return LandsatSubCollection(col, self.dates_list, self)
 
     
     def ndvi_collection(self, threshold):
         col = self.collection.map(lambda image: LandsatCollection.landsat_ndvi_fn(image, threshold=self.ndvi_threshold))
-        return LandsatSubCollection(col, self.dates_list)
+        return LandsatSubCollection(col, self.dates_list, self)
 
     def halite_collection(self, threshold):
         col = self.collection.map(lambda image: LandsatCollection.landsat_halite_fn(image, threshold=self.halite_threshold))
-        return LandsatSubCollection(col, self.dates_list)
+        return LandsatSubCollection(col, self.dates_list, self)
 
     def gypsum_collection(self, threshold):
         col = self.collection.map(lambda image: LandsatCollection.landsat_gypsum_fn(image, threshold=self.gypsum_threshold))
-        return LandsatSubCollection(col, self.dates_list)
+        return LandsatSubCollection(col, self.dates_list, self)
+
+    def indices_collection(self, indices=None, thresholds=None):
+        # Computes several indices (default: all of index_names) in a single map, one multi-band image per date, instead
+        # of one collection per index each re-reading the surface reflectance bands. thresholds ({index: threshold})
+        # override the class thresholds. Pair with area_time_series(list of bands) to sum every index's area at once
+        indices = list(dict.fromkeys(indices or self.index_names))
+        unsupported = [name for name in indices if name not in self.index_names]
+        if unsupported:
+            raise ValueError(f"Unsupported indices {unsupported}. Must be in {self.index_names}.")
+        thresholds = {**{name: getattr(self, name + '_threshold') for name in indices if name != 'LST'}, **(thresholds or {})}
+        col = self.collection.map(lambda image: LandsatCollection.landsat_indices_fn(image, indices, thresholds))
+        return LandsatSubCollection(col, self.dates_list, self)
 
     def masked_water_collection(self):
         col = self.collection.map(LandsatCollection.MaskWaterLandsat)
-        return LandsatSubCollection(col, self.dates_list)
-    
-    def masked_clouds_collection(self):
-        col = self.collection.map(LandsatCollection.maskL8clouds)
-        return LandsatSubCollection(col, self.dates_list)
+        return LandsatSubCollection(col, self.dates_list, self)
     
     def surface_temperature_collection(self):
         col = self.collection.map(LandsatCollection.temperature_bands).map(LandsatCollection.landsat_LST).map(LandsatCollection.image_dater)
-        return LandsatSubCollection(col, self.dates_list)
+        return LandsatSubCollection(col, self.dates_list, self)
     
     def list_of_dates(self):
         dates = self.collection.aggregate_array('Date_Filter') #.getInfo()
         return dates
+
+    @property
+    def dates(self):
+        # Client-side list of dates, evaluated on first access and memoized
+        if self._dates is None:
+            self._dates = get_info(self.dates_list)
+        return self._dates
+
+    def prefetch_dates(self):
+        # Explicitly evaluate the client-side dates now (e.g. from a worker thread) and return self for chaining
+        self.dates
+        return self
+
+    def collection_metadata(self):
+        # Per-image table of metadata_properties fetched in a single round trip and cached client-side
+        if self._metadata is None:
+            self._metadata = fetch_collection_metadata(self.collection, self.metadata_properties)
+            self._metadata_by_date = metadata_by_date(self._metadata)
+            if self._dates is None:
+                self._dates = [row.get('Date_Filter') for row in self._metadata]  # dates come for free with the metadata
+        return self._metadata
+
+    def metadata_for_date(self, img_date):
+        # Client-side lookup of an image's metadata by Date_Filter, no round trip once collection_metadata() is cached
+        metadata = self.collection_metadata()
+        if self._metadata_by_date is None:  # metadata inherited from the parent collection
+            self._metadata_by_date = metadata_by_date(metadata)
+        return self._metadata_by_date[img_date]
+
+    async def dates_async(self, runner=None):
+        # Awaitable version of the dates property, evaluated on the async runner's thread pool
+        if self._dates is None:
+            self._dates = await (runner or async_runner).evaluate(self.dates_list)
+        return self._dates
+
+    def otsu_threshold_rows(self, geometry, band_name='ndwi', scale=30, buffer=6000, otsu_method='cumulative'):
+        # Server-side ee.List of [Date_Filter, Otsu threshold] for every image, the histograms of all dates computed in one
+        # mapped pass over a buffered geometry that is built once
+        histogram_geometry = geometry.geometry().buffer(buffer)
+        def threshold_fn(image):
+            return image.set('otsu_threshold', LandsatCollection.ImageOtsuThreshold(image, band_name, histogram_geometry, scale, otsu_method))
+        return ee.List(self.collection.map(threshold_fn).reduceColumns(ee.Reducer.toList(2), ['Date_Filter', 'otsu_threshold']).get('list'))
+
+    def otsu_thresholds(self, geometry, band_name='ndwi', scale=30, buffer=6000, otsu_method='cumulative', cache=None):
+        # {Date_Filter: Otsu threshold} for every image (without dNDWIPixelAreaSum's 0.15 offset), fetched in one round
+        # trip and kept on the collection, so later dynamic-threshold area calls reuse it instead of re-deriving the
+        # histograms. Dates whose histogram is empty have no threshold
+        key = (band_name, expression_hash(geometry), scale, buffer, otsu_method)
+        if key not in self._otsu_thresholds:
+            self._otsu_thresholds[key] = dict(get_info(self.otsu_threshold_rows(geometry, band_name, scale, buffer, otsu_method), cache=cache))
+        return self._otsu_thresholds[key]
+
+    def area_time_series_rows(self, band_name, geometry, threshold=-1, scale=30, maxPixels=1e12, dynamic_threshold=False, thresholds=None):
+        # Server-side ee.List of [Date_Filter, area] for every image. dynamic_threshold=True uses the per-image Otsu
+        # threshold of dNDWIPixelAreaSum instead of a fixed threshold (geometry must then be a Feature/FeatureCollection),
+        # taken from thresholds ({Date_Filter: threshold} from otsu_thresholds) when given, else computed in the same pass.
+        # A list of band names gives [Date_Filter, area, area, ...] rows from one reduceRegion per image (PixelAreaSums)
+        collection = self.collection
+        if isinstance(band_name, (list, tuple)):
+            if dynamic_threshold:
+                raise ValueError("dynamic_threshold requires a single band_name")
+            area_fn = lambda image: LandsatCollection.PixelAreaSums(image, band_name, geometry, threshold=threshold, scale=scale, maxPixels=maxPixels)
+            return pixel_area_rows(collection, list(band_name), area_fn)
+        if dynamic_threshold:
+            if thresholds is None:
+                rows = self.otsu_threshold_rows(geometry, band_name, scale)
+                thresholds = ee.Dictionary.fromLists(rows.map(lambda row: ee.List(row).get(0)), rows.map(lambda row: ee.List(row).get(1)))
+            thresholds = ee.Dictionary(thresholds)
+            collection = collection.filter(ee.Filter.inList('Date_Filter', thresholds.keys()))
+            area_fn = lambda image: LandsatCollection.dNDWIPixelAreaSum(image, geometry, band_name=band_name, scale=scale, maxPixels=maxPixels, threshold=thresholds.getNumber(image.get('Date_Filter')))
+        else:
+            area_fn = lambda image: LandsatCollection.PixelAreaSum(image, band_name, geometry, threshold=threshold, scale=scale, maxPixels=maxPixels)
+        return pixel_area_rows(collection, band_name, area_fn)
+
+    def area_time_series(self, band_name, geometry, threshold=-1, scale=30, maxPixels=1e12, dynamic_threshold=False, cache=None):
+        # Pixel area (m^2) of band_name within geometry for every image, as a pandas Series indexed by Date_Filter.
+        # The area reducer is mapped server-side and the whole series comes back in a single round trip (plus one for
+        # the Otsu thresholds with dynamic_threshold=True, the first time they are needed). With a list of band names
+        # (e.g. of indices_collection) a DataFrame with a column per band is returned, from the same single round trip
+        thresholds = self.otsu_thresholds(geometry, band_name, scale, cache=cache) if dynamic_threshold and isinstance(band_name, str) else None
+        rows = get_info(self.area_time_series_rows(band_name, geometry, threshold, scale, maxPixels, dynamic_threshold, thresholds), cache=cache)
+        return area_series(rows, band_name)
+
+    def scene_area(self, img_date, band_name, geometry, threshold=-1, scale=30, maxPixels=1e12, dynamic_threshold=False, cache=None):
+        # Pixel area (m^2) of band_name within geometry for the image of a single date. Pass a ResultCache to serve
+        # previously computed scenes locally
+        image = self.image_pick(img_date)
+        if dynamic_threshold:
+            # The date's Otsu threshold is reused when otsu_thresholds() has already fetched it, otherwise it is computed
+            # for this image only, in the same evaluation
+            otsu_threshold = self._otsu_thresholds.get((band_name, expression_hash(geometry), scale, 6000, 'cumulative'), {}).get(img_date)
+            image = LandsatCollection.dNDWIPixelAreaSum(image, geometry, band_name=band_name, scale=scale, maxPixels=maxPixels, threshold=otsu_threshold)
+        else:
+            image = LandsatCollection.PixelAreaSum(image, band_name, geometry, threshold=threshold, scale=scale, maxPixels=maxPixels)
+        return get_info(image.get(band_name), cache=cache)
+
+    async def area_series_async(self, band_name, geometry, threshold=-1, scale=30, maxPixels=1e12, dynamic_threshold=False, runner=None):
+        # Awaitable version of area_time_series. Otsu thresholds are computed in the same evaluation unless
+        # otsu_thresholds() has already cached them
+        thresholds = None
+        if dynamic_threshold:
+            thresholds = self._otsu_thresholds.get((band_name, expression_hash(geometry), scale, 6000, 'cumulative'))
+        rows = await (runner or async_runner).evaluate(self.area_time_series_rows(band_name, geometry, threshold, scale, maxPixels, dynamic_threshold, thresholds))
+        return area_series(rows, band_name)
     
 
     def image_grab(self, img_selector):
@@ -262,39 +506,46 @@ class LandsatCollection:
         return new_col.first()
 
     def CollectionStitch(self, img_col2):
-        dates_list = ee.List(self.dates_list).cat(ee.List(img_col2.dates_list)).distinct()
-        filtered_dates1 = self.dates_list
-        filtered_dates2 = img_col2.dates_list
-
-        filtered_col2 = img_col2.collection.filter(ee.Filter.inList('Date_Filter', filtered_dates1))
-        filtered_col1 = self.collection.filter(ee.Filter.inList('Date_Filter', filtered_col2.aggregate_array('Date_Filter')))
-
-        # Create a function that will be mapped over filtered_col1
-        def mosaic_images(img):
-            # Get the date of the image
-            date = img.get('Date_Filter')
-            
-            # Get the corresponding image from filtered_col2
-            img2 = filtered_col2.filter(ee.Filter.equals('Date_Filter', date)).first()
-
-            # Create a mosaic of the two images
-            mosaic = ee.ImageCollection.fromImages([img, img2]).mosaic()
-
-            # Copy properties from the first image and set the 'Date_Filter' property
-            mosaic = mosaic.copyProperties(img).set('Date_Filter', date).set('system:time_start', img.get('system:time_start'))
-
-            return mosaic
-
-        # Map the function over filtered_col1
-        new_col = filtered_col1.map(mosaic_images)
+        # Mosaics the images of both collections that share a Date_Filter (images without a partner are dropped), pairing
+        # them with a single server-side join instead of filtering the other collection once per image
+        new_col = stitch_by_date(self.collection, img_col2.collection)
 
         # Return a LandsatCollection instance
         return LandsatCollection(collection=new_col)
     
 class LandsatSubCollection(LandsatCollection):
-    def __init__(self, collection, dates_list):
+    def __init__(self, collection, dates_list, parent=None):
         self.collection = collection
         self.dates_list = dates_list
+        # Sub-collections are mapped image-for-image from parent, so they share its client-side dates (fetched by
+        # either one) and fall back to its metadata rather than making their own round trips
+        self._parent = parent
+        self._own_dates = None
+        self._own_metadata = None
+        self._metadata_by_date = None
+        self._otsu_thresholds = {}
+
+    @property
+    def _dates(self):
+        if self._own_dates is None and self._parent is not None:
+            return self._parent._dates
+        return self._own_dates
+
+    @_dates.setter
+    def _dates(self, dates):
+        self._own_dates = dates
+        if self._parent is not None and self._parent._dates is None:
+            self._parent._dates = dates
+
+    @property
+    def _metadata(self):
+        if self._own_metadata is None and self._parent is not None:
+            return self._parent._metadata
+        return self._own_metadata
+
+    @_metadata.setter
+    def _metadata(self, metadata):
+        self._own_metadata = metadata
 
     def get_filtered_collection(self):
         return self.collection
@@ -302,6 +553,13 @@ class LandsatSubCollection(LandsatCollection):
 
 # Version of functions for sentinel 2 MSI
 class Sentinel2Collection:
+    metadata_properties = ['Date_Filter', 'system:time_start', 'SPACECRAFT_NAME', 'CLOUDY_PIXEL_PERCENTAGE', 'MGRS_TILE']
+    index_names = ['ndwi', 'ndvi', 'halite', 'gypsum']  # supported by indices_collection
+    ndwi_threshold = -1
+    ndvi_threshold = -1
+    halite_threshold = -1
+    gypsum_threshold = -1
+
     def __init__(self, start_date=None, end_date=None, tile=None, cloud_percentage_threshold=None, nodata_threshold=None, collection=None):
         if collection is None and (start_date is None or end_date is None or tile is None or cloud_percentage_threshold is None or nodata_threshold is None):
             raise ValueError("Either provide all required fields (start_date, end_date, tile_row, tile_path, cloud_percentage_threshold) or provide a collection.")
@@ -318,40 +576,43 @@ class Sentinel2Collection:
             self.collection = collection
 
         self.dates_list = self.list_of_dates()
-        self.dates = self.dates_list.getInfo()
-        self.ndwi_threshold = -1
-        self.ndvi_threshold = -1
-        self.halite_threshold = -1
-        self.gypsum_threshold = -1
-        self.masked_clouds_collection = self.masked_clouds_collection()
+        self._dates = None  # client-side dates are only fetched when first used, see the dates property
+        self._metadata = None
+        self._metadata_by_date = None
 
-        # Check if the required bands are available
-        first_image = self.collection.first()
-        available_bands = first_image.bandNames()
+    # Derived sub-collections are only built the first time they are accessed
+    @cached_property
+    def masked_clouds_collection(self):
+        col = self.collection.map(Sentinel2Collection.MaskCloudsS2)
+        return Sentinel2SubCollection(col, self.dates_list, self)
 
+    @cached_property
+    def ndwi(self):
+        available_bands = self.collection.first().bandNames()
         if available_bands.contains('B3') and available_bands.contains('B8'):
-            self.ndwi = self.ndwi_collection(self.ndwi_threshold)
-        else:
-            self.ndwi = None
-            raise ValueError("Insufficient Bands for ndwi calculation")
-        
+            return self.ndwi_collection(self.ndwi_threshold)
+        raise ValueError("Insufficient Bands for ndwi calculation")
+
+    @cached_property
+    def ndvi(self):
+        available_bands = self.collection.first().bandNames()
         if available_bands.contains('B4') and available_bands.contains('B8'):
-            self.ndvi = self.ndvi_collection(self.ndvi_threshold)
-        else:
-            self.ndvi = None
-            raise ValueError("Insufficient Bands for ndvi calculation")
+            return self.ndvi_collection(self.ndvi_threshold)
+        raise ValueError("Insufficient Bands for ndvi calculation")
 
+    @cached_property
+    def halite(self):
+        available_bands = self.collection.first().bandNames()
         if available_bands.contains('B4') and available_bands.contains('B11'):
-            self.halite = self.halite_collection(self.halite_threshold)
-        else:
-            self.halite = None
-            raise ValueError("Insufficient Bands for halite calculation")
+            return self.halite_collection(self.halite_threshold)
+        raise ValueError("Insufficient Bands for halite calculation")
 
-        if available_bands.contains('SR_B6') and available_bands.contains('SR_B7'):
-            self.gypsum = self.gypsum_collection(self.gypsum_threshold)
-        else:
-            self.gypsum = None
-            raise ValueError("Insufficient Bands for gypsum calculation")
+    @cached_property
+    def gypsum(self):
+        available_bands = self.collection.first().bandNames()
+        if available_bands.contains('B11') and available_bands.contains('B12'):
+            return self.gypsum_collection(self.gypsum_threshold)
+        raise ValueError("Insufficient Bands for gypsum calculation")
 
     @staticmethod
     def image_dater(image):
@@ -382,6 +643,14 @@ class Sentinel2Collection:
         gypsum_index = image.normalizedDifference(['B11', 'B12'])
         gypsum = gypsum_index.updateMask(gypsum_index.gte(threshold)).rename('gypsum').copyProperties(image)
         return gypsum
+
+    @staticmethod
+    def sentinel_indices_fn(image, indices, thresholds):
+        # One image with a band per index (named like the single-index collections, each with its own threshold mask)
+        # and the properties of image, so all indices are computed from a single read of the scene
+        index_fns = {'ndwi': Sentinel2Collection.sentinel_ndwi_fn, 'ndvi': Sentinel2Collection.sentinel_ndvi_fn,
+                     'halite': Sentinel2Collection.sentinel_halite_fn, 'gypsum': Sentinel2Collection.sentinel_gypsum_fn}
+        return ee.Image.cat([index_fns[name](image, thresholds[name]) for name in indices]).copyProperties(image)
     
     @staticmethod
     def MaskCloudsS2(image):
@@ -407,41 +676,138 @@ class Sentinel2Collection:
             scale=scale,
             maxPixels = maxPixels)
         return image.set(band_name, stats.get(band_name)) #calculates and returns summed pixel area as image property titled the same as the band name of the band used for calculation
+
+    @staticmethod
+    def PixelAreaSums(image, band_names, geometry, threshold=-1, scale=10, maxPixels=1e12):
+        # PixelAreaSum of several bands (e.g. of an indices_collection image) at once: the masked pixel areas are stacked
+        # into one image and summed by a single reduceRegion, each area set as a property named after its band.
+        # threshold is a number or a {band_name: threshold} dictionary
+        thresholds = threshold if isinstance(threshold, dict) else {band_name: threshold for band_name in band_names}
+        area_image = ee.Image.pixelArea()
+        areas = ee.Image.cat([area_image.updateMask(image.select(band_name).gte(thresholds.get(band_name, -1))).rename(band_name) for band_name in band_names])
+        stats = areas.reduceRegion(
+            reducer = ee.Reducer.sum(),
+            geometry= geometry,
+            scale=scale,
+            maxPixels = maxPixels)
+        return image.set(stats)
     
     def get_filtered_collection(self):
+        initialize()
         sentinel2 = ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED")
         filtered_collection = sentinel2.filterDate(self.start_date, self.end_date).filter(ee.Filter.inList('MGRS_TILE', [self.tile])).filter(ee.Filter.lte('NODATA_PIXEL_PERCENTAGE', self.nodata_threshold)) \
                                                         .filter(ee.Filter.lte('CLOUDY_PIXEL_PERCENTAGE', self.cloud_percentage_threshold)).map(Sentinel2Collection.image_dater).sort('Date_Filter')
         return filtered_collection
 
+    @classmethod
+    def mosaic_by_date(cls, start_date, end_date, tiles, cloud_percentage_threshold, nodata_threshold, require_all_tiles=False):
+        # One collection mosaicking any number of MGRS tiles per Date_Filter, e.g. tiles=['12TVL', '12TVK', '12TWL'].
+        # All tiles are filtered together and grouped by date in a single server-side pass, instead of chaining pairwise
+        # CollectionStitch calls. With require_all_tiles=True only dates on which every tile has an image are kept
+        initialize()
+        sentinel2 = ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED")
+        filtered_collection = sentinel2.filterDate(start_date, end_date).filter(ee.Filter.inList('MGRS_TILE', list(tiles))).filter(ee.Filter.lte('NODATA_PIXEL_PERCENTAGE', nodata_threshold)) \
+                                                        .filter(ee.Filter.lte('CLOUDY_PIXEL_PERCENTAGE', cloud_percentage_threshold)).map(Sentinel2Collection.image_dater).sort('Date_Filter')
+        min_tiles = len(tiles) if require_all_tiles else 1
+        return cls(collection=mosaic_tiles_by_date(filtered_collection, ['MGRS_TILE'], min_tiles))
+
     def ndwi_collection(self, threshold):
         col =  self.collection.map(lambda image: Sentinel2Collection.sentinel_ndwi_fn(image, threshold=self.ndwi_threshold))
-        return Sentinel2SubCollection(col, self.dates_list)
+        return Sentinel2SubCollection(col, self.dates_list, self)
     
     def ndvi_collection(self, threshold):
         col = self.collection.map(lambda image: Sentinel2Collection.sentinel_ndvi_fn(image, threshold=self.ndvi_threshold))
-        return Sentinel2SubCollection(col, self.dates_list)
+        return Sentinel2SubCollection(col, self.dates_list, self)
 
     def halite_collection(self, threshold):
         col = self.collection.map(lambda image: Sentinel2Collection.sentinel_halite_fn(image, threshold=self.halite_threshold))
-        return Sentinel2SubCollection(col, self.dates_list)
+        return Sentinel2SubCollection(col, self.dates_list, self)
 
     def gypsum_collection(self, threshold):
         col = self.collection.map(lambda image: Sentinel2Collection.sentinel_gypsum_fn(image, threshold=self.gypsum_threshold))
-        return Sentinel2SubCollection(col, self.dates_list)
+        return Sentinel2SubCollection(col, self.dates_list, self)
+
+    def indices_collection(self, indices=None, thresholds=None):
+        # Computes several indices (default: all of index_names) in a single map, one multi-band image per date, instead
+        # of one collection per index each re-reading the surface reflectance bands. thresholds ({index: threshold})
+        # override the class thresholds. Pair with area_time_series(list of bands) to sum every index's area at once
+        indices = list(dict.fromkeys(indices or self.index_names))
+        unsupported = [name for name in indices if name not in self.index_names]
+        if unsupported:
+            raise ValueError(f"Unsupported indices {unsupported}. Must be in {self.index_names}.")
+        thresholds = {**{name: getattr(self, name + '_threshold') for name in indices}, **(thresholds or {})}
+        col = self.collection.map(lambda image: Sentinel2Collection.sentinel_indices_fn(image, indices, thresholds))
+        return Sentinel2SubCollection(col, self.dates_list, self)
 
     def masked_water_collection(self):
         col = self.collection.map(Sentinel2Collection.MaskWaterS2)
-        return Sentinel2SubCollection(col, self.dates_list)
-    
-    def masked_clouds_collection(self):
-        col = self.collection.map(Sentinel2Collection.MaskCloudsS2)
-        return Sentinel2SubCollection(col, self.dates_list)
+        return Sentinel2SubCollection(col, self.dates_list, self)
     
     
     def list_of_dates(self):
         dates = self.collection.aggregate_array('Date_Filter') #.getInfo()
         return dates
+
+    @property
+    def dates(self):
+        # Client-side list of dates, evaluated on first access and memoized
+        if self._dates is None:
+            self._dates = get_info(self.dates_list)
+        return self._dates
+
+    def prefetch_dates(self):
+        # Explicitly evaluate the client-side dates now (e.g. from a worker thread) and return self for chaining
+        self.dates
+        return self
+
+    def collection_metadata(self):
+        # Per-image table of metadata_properties fetched in a single round trip and cached client-side
+        if self._metadata is None:
+            self._metadata = fetch_collection_metadata(self.collection, self.metadata_properties)
+            self._metadata_by_date = metadata_by_date(self._metadata)
+            if self._dates is None:
+                self._dates = [row.get('Date_Filter') for row in self._metadata]  # dates come for free with the metadata
+        return self._metadata
+
+    def metadata_for_date(self, img_date):
+        # Client-side lookup of an image's metadata by Date_Filter, no round trip once collection_metadata() is cached
+        metadata = self.collection_metadata()
+        if self._metadata_by_date is None:  # metadata inherited from the parent collection
+            self._metadata_by_date = metadata_by_date(metadata)
+        return self._metadata_by_date[img_date]
+
+    async def dates_async(self, runner=None):
+        # Awaitable version of the dates property, evaluated on the async runner's thread pool
+        if self._dates is None:
+            self._dates = await (runner or async_runner).evaluate(self.dates_list)
+        return self._dates
+
+    def area_time_series_rows(self, band_name, geometry, threshold=-1, scale=10, maxPixels=1e12):
+        # Server-side ee.List of [Date_Filter, area] for every image. A list of band names gives [Date_Filter, area, area, ...]
+        # rows from one reduceRegion per image (PixelAreaSums)
+        if isinstance(band_name, (list, tuple)):
+            area_fn = lambda image: Sentinel2Collection.PixelAreaSums(image, band_name, geometry, threshold=threshold, scale=scale, maxPixels=maxPixels)
+            return pixel_area_rows(self.collection, list(band_name), area_fn)
+        area_fn = lambda image: Sentinel2Collection.PixelAreaSum(image, band_name, geometry, threshold=threshold, scale=scale, maxPixels=maxPixels)
+        return pixel_area_rows(self.collection, band_name, area_fn)
+
+    def area_time_series(self, band_name, geometry, threshold=-1, scale=10, maxPixels=1e12, cache=None):
+        # Pixel area (m^2) of band_name within geometry for every image, as a pandas Series indexed by Date_Filter.
+        # The area reducer is mapped server-side and the whole series comes back in a single round trip. With a list of
+        # band names (e.g. of indices_collection) a DataFrame with a column per band is returned
+        rows = get_info(self.area_time_series_rows(band_name, geometry, threshold, scale, maxPixels), cache=cache)
+        return area_series(rows, band_name)
+
+    def scene_area(self, img_date, band_name, geometry, threshold=-1, scale=10, maxPixels=1e12, cache=None):
+        # Pixel area (m^2) of band_name within geometry for the image of a single date. Pass a ResultCache to serve
+        # previously computed scenes locally
+        image = Sentinel2Collection.PixelAreaSum(self.image_pick(img_date), band_name, geometry, threshold=threshold, scale=scale, maxPixels=maxPixels)
+        return get_info(image.get(band_name), cache=cache)
+
+    async def area_series_async(self, band_name, geometry, threshold=-1, scale=10, maxPixels=1e12, runner=None):
+        # Awaitable version of area_time_series
+        rows = await (runner or async_runner).evaluate(self.area_time_series_rows(band_name, geometry, threshold, scale, maxPixels))
+        return area_series(rows, band_name)
     
 
     def image_grab(self, img_selector):
@@ -463,62 +829,741 @@ class Sentinel2Collection:
         return new_col.first()
     
     def CollectionStitch(self, img_col2):
-        dates_list = ee.List(self.dates_list).cat(ee.List(img_col2.dates_list)).distinct()
-        filtered_dates1 = self.dates_list
-        filtered_dates2 = img_col2.dates_list
-
-        filtered_col2 = img_col2.collection.filter(ee.Filter.inList('Date_Filter', filtered_dates1))
-        filtered_col1 = self.collection.filter(ee.Filter.inList('Date_Filter', filtered_col2.aggregate_array('Date_Filter')))
-
-        # Create a function that will be mapped over filtered_col1
-        def mosaic_images(img):
-            # Get the date of the image
-            date = img.get('Date_Filter')
-            
-            # Get the corresponding image from filtered_col2
-            img2 = filtered_col2.filter(ee.Filter.equals('Date_Filter', date)).first()
-
-            # Create a mosaic of the two images
-            mosaic = ee.ImageCollection.fromImages([img, img2]).mosaic()
-
-            # Copy properties from the first image and set the time properties
-            mosaic = mosaic.copyProperties(img).set('Date_Filter', date).set('system:time_start', img.get('system:time_start'))
-
-            return mosaic
-
-        # Map the function over filtered_col1
-        new_col = filtered_col1.map(mosaic_images)
+        # Mosaics the images of both collections that share a Date_Filter (images without a partner are dropped), pairing
+        # them with a single server-side join instead of filtering the other collection once per image
+        new_col = stitch_by_date(self.collection, img_col2.collection)
 
         # Return a Sentinel2Collection instance
         return Sentinel2Collection(collection=new_col)
 
 class Sentinel2SubCollection(Sentinel2Collection):
-    def __init__(self, collection, dates_list):
+    def __init__(self, collection, dates_list, parent=None):
         self.collection = collection
         self.dates_list = dates_list
+        # Sub-collections are mapped image-for-image from parent, so they share its client-side dates (fetched by
+        # either one) and fall back to its metadata rather than making their own round trips
+        self._parent = parent
+        self._own_dates = None
+        self._own_metadata = None
+        self._metadata_by_date = None
+
+    @property
+    def _dates(self):
+        if self._own_dates is None and self._parent is not None:
+            return self._parent._dates
+        return self._own_dates
+
+    @_dates.setter
+    def _dates(self, dates):
+        self._own_dates = dates
+        if self._parent is not None and self._parent._dates is None:
+            self._parent._dates = dates
+
+    @property
+    def _metadata(self):
+        if self._own_metadata is None and self._parent is not None:
+            return self._parent._metadata
+        return self._own_metadata
+
+    @_metadata.setter
+    def _metadata(self, metadata):
+        self._own_metadata = metadata
 
     def get_filtered_collection(self):
         return self.collection
 
 #Older method of manually stitching collections outside of class framing
 def CollectionStitch(img_col1, img_col2, copy_properties_from=1):  # this function mosaics north and south images only if their dates match. Ignores scenes without a partner.
-    image_list = []
-    dates_list = img_col1.dates_list + img_col2.dates_list
-    dates_list = sorted(list(set(dates_list)))  # Get unique sorted list of dates
-
-    for date in dates_list:
-        if date in img_col1.dates_list and date in img_col2.dates_list:
-            filtered_col1 = img_col1.image_grab(img_col1.dates_list.index(date))
-            filtered_col2 = img_col2.image_grab(img_col2.dates_list.index(date))
-            merged_col = ee.ImageCollection.fromImages([filtered_col1, filtered_col2])
-            if copy_properties_from == 1:
-                mosaic = merged_col.mosaic().copyProperties(filtered_col1)  # new collection images contain all image properties of the northern landsat image
-            elif copy_properties_from == 2:
-                mosaic = merged_col.mosaic().copyProperties(filtered_col2)  # new collection images contain all image properties of the southern landsat image
+    # img_col1/img_col2 are LandsatCollection or Sentinel2Collection objects. Like the original per-date loop, only the
+    # first img_col1 image of each Date_Filter is used, and it is mosaicked with the first img_col2 image of that date
+    # (copying the properties of the img_col1 (1) or img_col2 (2) image) - but paired with one server-side join
+    # (stitch_by_date), so the expression no longer grows with the number of dates and no client-side dates are needed
+    return stitch_by_date(img_col1.collection.distinct('Date_Filter'), img_col2.collection, copy_properties_from)
+
+
+def fetch_collection_metadata(collection, properties):
+    # Pulls the given properties of every image in the collection with one getInfo call, as a list of dicts in collection order
+    rows = collection.toList(collection.size()).map(lambda img: ee.Image(img).toDictionary(properties))
+    return get_info(rows)
+
+def metadata_by_date(rows):
+    # {Date_Filter: row} index of collection metadata rows, keeping the first image of each date
+    index = {}
+    for row in rows:
+        index.setdefault(row.get('Date_Filter'), row)
+    return index
+
+def stitch_by_date(img_col1, img_col2, copy_properties_from=1):
+    # Pairs every image of img_col1 with the first img_col2 image of the same Date_Filter (ee.Join.saveFirst, so images
+    # without a partner are dropped) and mosaics each pair, keeping the properties, Date_Filter and system:time_start of
+    # the img_col1 (1) or img_col2 (2) image. Builds one expression regardless of collection length
+    if copy_properties_from not in (1, 2):
+        raise ValueError("Invalid value for 'copy_properties_from'. Must be 1 or 2.")
+    date_filter = ee.Filter.equals(leftField='Date_Filter', rightField='Date_Filter')
+    joined = ee.ImageCollection(ee.Join.saveFirst('stitch_partner').apply(img_col1, img_col2, date_filter))
+
+    def mosaic_images(img):
+        partner = ee.Image(img.get('stitch_partner'))
+        source = img if copy_properties_from == 1 else partner
+        mosaic = ee.ImageCollection.fromImages([img, partner]).mosaic()
+        return mosaic.copyProperties(source, exclude=['stitch_partner']).set('Date_Filter', source.get('Date_Filter')).set('system:time_start', source.get('system:time_start'))
+
+    return joined.map(mosaic_images)
+
+def mosaic_tiles_by_date(collection, tile_properties, min_tiles=1):
+    # Groups a multi-tile collection by Date_Filter in one pass - the distinct dates joined (ee.Join.saveAll) against every
+    # image - and mosaics each group, keeping the first image's properties. tile_count is set to the number of distinct
+    # tiles (identified by tile_properties) in the mosaic, and dates with fewer than min_tiles tiles are dropped
+    date_filter = ee.Filter.equals(leftField='Date_Filter', rightField='Date_Filter')
+    joined = ee.ImageCollection(ee.Join.saveAll('tile_images').apply(collection.distinct('Date_Filter'), collection, date_filter))
+
+    def mosaic_images(img):
+        tile_images = ee.List(img.get('tile_images'))
+        tile_count = tile_images.map(lambda tile: ee.Image(tile).toDictionary(tile_properties).values()).distinct().size()
+        mosaic = ee.ImageCollection.fromImages(tile_images).mosaic()
+        return mosaic.copyProperties(img, exclude=['tile_images']).set('Date_Filter', img.get('Date_Filter')).set('system:time_start', img.get('system:time_start')).set('tile_count', tile_count)
+
+    mosaics = joined.map(mosaic_images)
+    if min_tiles > 1:
+        mosaics = mosaics.filter(ee.Filter.gte('tile_count', min_tiles))
+    return mosaics
+
+def pixel_area_rows(collection, band_name, area_fn):
+    # Maps area_fn (e.g. a PixelAreaSum, which sets the area as the band_name property) over the collection server-side
+    # and gathers the [Date_Filter, area] pairs into one ee.List, so the whole series is a single evaluation. With a
+    # list of band names (PixelAreaSums) the rows are [Date_Filter, area, area, ...]
+    band_names = band_name if isinstance(band_name, list) else [band_name]
+    col = collection.map(area_fn)
+    return ee.List(col.reduceColumns(ee.Reducer.toList(len(band_names) + 1), ['Date_Filter'] + band_names).get('list'))
+
+def area_series(rows, band_name):
+    # Client-side [[Date_Filter, area], ...] rows to a pandas Series indexed by Date_Filter, or for a list of band names
+    # [[Date_Filter, area, area, ...], ...] rows to a DataFrame with a column per band
+    import pandas as pd  # only needed for the time-series API
+    dates = pd.DatetimeIndex([row[0] for row in rows], name='Date_Filter')
+    if isinstance(band_name, (list, tuple)):
+        return pd.DataFrame([row[1:] for row in rows], index=dates, columns=list(band_name), dtype='float64')
+    return pd.Series([row[1] for row in rows], index=dates, name=band_name, dtype='float64')
+
+# Process-wide cache of built collections, so repeated requests for the same tiles/dates (e.g. Streamlit reruns) reuse
+# the already-built collection objects and their client-side dates instead of rebuilding them from scratch
+class TTLCache:
+    def __init__(self, maxsize=64, ttl=6*60*60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expiry time, value), ordered from least to most recently used
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)  # evict least recently used entry
+
+    def get_or_set(self, key, factory):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = factory()  # built outside the lock so slow builds don't block other keys
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
             else:
-                raise ValueError("Invalid value for 'copy_properties_from'. Must be 1 or 2.")  # new collection images contain all image properties of the northern landsat image
-            image_list.append(mosaic)
-        else:
-            None  # If the condition isn't met, do nothing and keep going through the list
-    new_col = ee.ImageCollection.fromImages(image_list)
-    return new_col
\ No newline at end of file
+                self._entries.pop(key, None)
+
+    def discard(self, key, value):
+        # Removes key only while it still holds value, so a newer entry stored under the same key is kept
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is value:
+                del self._entries[key]
+
+    def __contains__(self, key):
+        missing = object()
+        return self.get(key, missing) is not missing
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+collection_cache = TTLCache()
+
+# Bounded pool used to issue independent getInfo round trips concurrently
+collection_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='RadGEEToolbox')
+
+def submit_in_context(executor, fn, *args):
+    # executor.submit in a copy of the caller's context, so the work is attributed to the caller's instrumented request
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+def build_stitched_pair(col_N, col_S, executor=None):
+    # Stitches the two collections and fetches the stitched metadata (and dates) on the thread pool.
+    # Returns a Future of the stitched collection, so several pairs can be in flight at once
+    executor = executor or collection_executor
+    def build():
+        stitched = col_N.CollectionStitch(col_S)
+        stitched.collection_metadata()  # dates and per-image metadata of the stitched collection in one round trip
+        return stitched
+    return submit_in_context(executor, build)
+
+def _failed(future):
+    return future.cancelled() or future.exception() is not None
+
+def _cached_future(cache, key, submit):
+    # Don't keep failed builds around, the next request should retry. The callback is registered once per build and
+    # only removes that build's entry, never a newer one stored under the same key
+    def create():
+        future = submit()
+        future.add_done_callback(lambda f: _failed(f) and cache.discard(key, f))
+        return future
+    future = cache.get_or_set(key, create)
+    if future.done() and _failed(future):
+        cache.discard(key, future)  # failed before get_or_set stored it
+    return future
+
+def cached_landsat_stitch(start_date, end_date, tile_row_N, tile_row_S, tile_path, cloud_percentage_threshold, mask_clouds=False, cache=collection_cache, wait=True, executor=None):
+    # start_date/end_date should be plain 'YYYY-MM-dd' strings so they can be used as part of the cache key.
+    # With wait=False the Future of the stitched collection is returned instead of blocking on it. executor defaults to
+    # collection_executor
+    key = ('landsat', tile_path, tile_row_N, tile_row_S, str(start_date), str(end_date), cloud_percentage_threshold, mask_clouds)
+    def submit():
+        landsat_N = LandsatCollection(start_date, end_date, tile_row_N, tile_path, cloud_percentage_threshold)
+        landsat_S = LandsatCollection(start_date, end_date, tile_row_S, tile_path, cloud_percentage_threshold)
+        if mask_clouds:
+            landsat_N = landsat_N.masked_clouds_collection
+            landsat_S = landsat_S.masked_clouds_collection
+        return build_stitched_pair(landsat_N, landsat_S, executor)
+    future = _cached_future(cache, key, submit)
+    return future.result() if wait else future
+
+def cached_sentinel2_stitch(start_date, end_date, tile_N, tile_S, cloud_percentage_threshold, nodata_threshold, mask_clouds=False, cache=collection_cache, wait=True, executor=None):
+    # start_date/end_date should be plain 'YYYY-MM-dd' strings so they can be used as part of the cache key.
+    # With wait=False the Future of the stitched collection is returned instead of blocking on it. executor defaults to
+    # collection_executor
+    key = ('sentinel2', tile_N, tile_S, str(start_date), str(end_date), cloud_percentage_threshold, nodata_threshold, mask_clouds)
+    def submit():
+        sentinel_N = Sentinel2Collection(start_date, end_date, tile_N, cloud_percentage_threshold, nodata_threshold)
+        sentinel_S = Sentinel2Collection(start_date, end_date, tile_S, cloud_percentage_threshold, nodata_threshold)
+        if mask_clouds:
+            sentinel_N = sentinel_N.masked_clouds_collection
+            sentinel_S = sentinel_S.masked_clouds_collection
+        return build_stitched_pair(sentinel_N, sentinel_S, executor)
+    future = _cached_future(cache, key, submit)
+    return future.result() if wait else future
+
+# Prebuilds the stitched collections (and their dates) of a set of regions into the shared collection cache on a
+# background timer, so interactive requests hit warm entries. Regions are dicts with path, row_N, row_S, tile_N and
+# tile_S, like those of RegionRegistry. The default window is the last `days` days up to today, matching the app's
+# default date inputs; each tick re-requests every key, so expired entries and new windows after midnight get rebuilt.
+# Builds run one at a time on their own single-worker executor, so a tick never queues work ahead of interactive
+# requests on collection_executor; a key the warm-up hasn't reached yet is simply built by the request that needs it
+warmup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='RadGEEToolbox-warmup')
+
+class WarmupScheduler:
+    def __init__(self, regions, interval=30*60, days=31, cloud_percentage_threshold=100, nodata_threshold=30, mask_clouds=(False,), cache=collection_cache, executor=warmup_executor):
+        self.regions = list(regions)
+        self.interval = interval
+        self.days = days
+        self.cloud_percentage_threshold = cloud_percentage_threshold
+        self.nodata_threshold = nodata_threshold
+        self.mask_clouds = mask_clouds
+        self.cache = cache
+        self.executor = executor
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def window(self):
+        today = datetime.date.today()
+        return str(today - datetime.timedelta(days=self.days)), str(today)
+
+    def warm(self):
+        # Builds every region/sensor/masking combination in turn, waiting for each before requesting the next (entries
+        # that are already cached return at once); returns the Futures
+        start_date, end_date = self.window()
+        futures = []
+        for region in self.regions:
+            for mask_clouds in self.mask_clouds:
+                builds = [lambda: cached_landsat_stitch(start_date, end_date, region['row_N'], region['row_S'], region['path'], self.cloud_percentage_threshold, mask_clouds, cache=self.cache, wait=False, executor=self.executor),
+                          lambda: cached_sentinel2_stitch(start_date, end_date, region['tile_N'], region['tile_S'], self.cloud_percentage_threshold, self.nodata_threshold, mask_clouds, cache=self.cache, wait=False, executor=self.executor)]
+                for build in builds:
+                    try:
+                        future = build()
+                        futures.append(future)
+                        future.exception()  # waits; a failed build isn't cached, the next tick retries it
+                    except Exception:
+                        pass
+        return futures
+
+    def _tick(self):
+        self.warm()
+        with self._lock:
+            if self._timer is not None:
+                self._schedule()
+
+    def _schedule(self):
+        self._timer = threading.Timer(self.interval, self._tick)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def start(self):
+        # Idempotent; the first warm-up runs immediately on a background thread
+        with self._lock:
+            if self._timer is not None:
+                return self
+            self._timer = threading.Timer(0, self._tick)
+            self._timer.daemon = True
+            self._timer.start()
+        return self
+
+    def stop(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+_warmup_scheduler = None
+_warmup_lock = threading.Lock()
+
+def start_warmup(regions, **kwargs):
+    # Starts the process-wide warm-up scheduler once; later calls (e.g. Streamlit reruns) return the running one
+    global _warmup_scheduler
+    with _warmup_lock:
+        if _warmup_scheduler is None:
+            _warmup_scheduler = WarmupScheduler(regions, **kwargs)
+    return _warmup_scheduler.start()
+
+# Asyncio facade: blocking evaluations run on a dedicated thread pool, so many collections (e.g. a sweep over every
+# path/row or MGRS tile) can be evaluated concurrently. max_concurrency bounds the evaluations in flight and
+# max_requests_per_second, if given, spaces out when new evaluations may start to stay within Earth Engine quota
+class EEAsyncRunner:
+    def __init__(self, max_concurrency=8, max_requests_per_second=None):
+        self.max_concurrency = max_concurrency
+        self.max_requests_per_second = max_requests_per_second
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='RadGEEToolbox-async')
+        self._throttle_lock = threading.Lock()
+        self._next_start = 0.0
+
+    def _throttle(self):
+        if not self.max_requests_per_second:
+            return
+        with self._throttle_lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + 1.0 / self.max_requests_per_second
+        time.sleep(start - now)
+
+    def _evaluate(self, obj):
+        self._throttle()
+        return get_info(obj)
+
+    async def evaluate(self, obj):
+        import asyncio  # only needed for the async API, kept out of the module import
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, contextvars.copy_context().run, self._evaluate, obj)
+
+    async def gather(self, objs):
+        import asyncio
+        return await asyncio.gather(*(self.evaluate(obj) for obj in objs))
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+async_runner = EEAsyncRunner()
+
+# Chunked, resumable evaluation of long time series. The date range is split into windows that are evaluated in
+# parallel; a window that fails with an Earth Engine timeout/memory error is bisected and retried, and every completed
+# window is checkpointed to checkpoint_dir so a crashed run resumes where it left off. evaluate_chunk(start, end)
+# must return client-side [[Date_Filter, value], ...] rows for images in [start, end)
+class ChunkedTimeSeriesExecutor:
+    splittable_errors = ('computation timed out', 'memory limit exceeded', 'too many pixels')
+
+    def __init__(self, evaluate_chunk, checkpoint_dir=None, max_workers=4, min_chunk_days=1):
+        self.evaluate_chunk = evaluate_chunk
+        self.checkpoint_dir = checkpoint_dir
+        self.max_workers = max_workers
+        self.min_chunk_days = min_chunk_days
+        if checkpoint_dir is not None:
+            os.makedirs(checkpoint_dir, exist_ok=True)
+
+    def is_splittable(self, error):
+        message = str(error).lower()
+        return any(pattern in message for pattern in self.splittable_errors)
+
+    def _checkpoint_path(self, start, end, suffix):
+        return os.path.join(self.checkpoint_dir, f'{start.isoformat()}_{end.isoformat()}.{suffix}')
+
+    def _load(self, start, end):
+        # Returns 'split' if this window was bisected in an earlier run, its rows if it was completed, else None
+        if self.checkpoint_dir is None:
+            return None
+        if os.path.exists(self._checkpoint_path(start, end, 'split')):
+            return 'split'
+        path = self._checkpoint_path(start, end, 'json')
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+        return None
+
+    def _save(self, start, end, suffix, rows=None):
+        if self.checkpoint_dir is None:
+            return
+        path = self._checkpoint_path(start, end, suffix)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(rows, f)
+        os.replace(path + '.tmp', path)  # atomic, so a crash never leaves a half-written checkpoint
+
+    @staticmethod
+    def _bisect(start, end):
+        middle = start + (end - start) // 2
+        return [(start, middle), (middle, end)]
+
+    def run(self, start_date, end_date, chunk_days=365):
+        start = datetime.date.fromisoformat(str(start_date)[:10])
+        end = datetime.date.fromisoformat(str(end_date)[:10])
+        pending = []
+        while start < end:
+            pending.append((start, min(start + datetime.timedelta(days=chunk_days), end)))
+            start = pending[-1][1]
+
+        results = {}  # window -> rows, windows don't overlap so every image is in exactly one of them
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='RadGEEToolbox-chunks') as executor:
+            running = {}
+            while pending or running:
+                while pending:
+                    window = pending.pop(0)
+                    checkpoint = self._load(*window)
+                    if checkpoint == 'split':
+                        pending[:0] = self._bisect(*window)
+                    elif checkpoint is not None:
+                        results[window] = checkpoint
+                    else:
+                        running[submit_in_context(executor, self.evaluate_chunk, window[0].isoformat(), window[1].isoformat())] = window
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    window = running.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        rows = future.result()
+                        self._save(*window, 'json', rows)
+                        results[window] = rows
+                    elif self.is_splittable(error) and (window[1] - window[0]).days > self.min_chunk_days:
+                        self._save(*window, 'split')
+                        pending[:0] = self._bisect(*window)
+                    else:
+                        for other in running:
+                            other.cancel()
+                        raise error
+        # All rows ([Date_Filter, value, ...]) in date order, keeping several images of the same date like the
+        # non-chunked series
+        return sorted((row for window in sorted(results) for row in results[window]), key=lambda row: row[0])
+
+def chunked_area_time_series(build_collection, start_date, end_date, band_name, geometry, chunk_days=365, checkpoint_dir=None, max_workers=4, cache=None, **area_kwargs):
+    # Long area time series (e.g. decades of Landsat) evaluated window by window with ChunkedTimeSeriesExecutor.
+    # build_collection(start, end) returns the toolbox collection for a window, e.g.
+    # lambda start, end: LandsatCollection(start, end, 31, 38, 100).ndwi
+    # band_name may be a list of bands (e.g. with .indices_collection()), giving a DataFrame like area_time_series.
+    # Use a separate checkpoint_dir for every distinct band/geometry/parameter combination
+    def evaluate_chunk(start, end):
+        return get_info(build_collection(start, end).area_time_series_rows(band_name, geometry, **area_kwargs), cache=cache)
+    executor = ChunkedTimeSeriesExecutor(evaluate_chunk, checkpoint_dir=checkpoint_dir, max_workers=max_workers)
+    return area_series(executor.run(start_date, end_date, chunk_days), band_name)
+
+def expression_hash(obj, *extra):
+    # Stable hash of an Earth Engine object's serialized expression graph, plus any extra key parts (e.g. scale, geometry)
+    # that aren't already part of the expression
+    encoded = json.dumps([ee.serializer.encode(obj), [ee.serializer.encode(part) for part in extra]], sort_keys=True)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+# Persistent on-disk cache of evaluated results keyed by expression_hash. Meant for results that never change, such as
+# area sums and Otsu thresholds of historical scenes - a collection whose date range is still open will keep the same
+# key as new scenes arrive, so don't cache those (or invalidate them). Holds at most max_entries, evicting the least
+# recently used. Hits don't write: last-used times are kept at touch_interval (seconds) granularity and written in
+# batches, and the row count is tracked in memory so inserts don't scan the table; eviction trims evict_fraction of
+# max_entries at once
+class ResultCache:
+    def __init__(self, path=os.path.join('~', '.radgeetoolbox', 'results.sqlite'), max_entries=100000, touch_interval=60, touch_batch=256, evict_fraction=0.01):
+        self.path = os.path.expanduser(path)
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.touch_batch = touch_batch
+        self.evict_count = max(1, int(max_entries * evict_fraction))
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')  # cheap commits, so cache writes stay fast
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        with self._db:
+            self._db.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used REAL NOT NULL)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)')
+        self._count = self._db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        self._touched = {}  # key -> last used time not yet written
+
+    def _flush_touched(self):
+        # Called with the lock held, inside a transaction
+        if self._touched:
+            self._db.executemany('UPDATE results SET last_used = ? WHERE key = ?', [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+
+    def get(self, key, default=None):
+        with self._lock:
+            row = self._db.execute('SELECT value, last_used FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return default
+            now = time.time()
+            if now - row[1] >= self.touch_interval:
+                self._touched[key] = now
+                if len(self._touched) >= self.touch_batch:
+                    with self._db:
+                        self._flush_touched()
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        with self._lock, self._db:
+            self._touched.pop(key, None)
+            exists = self._db.execute('SELECT 1 FROM results WHERE key = ?', (key,)).fetchone() is not None
+            self._db.execute('INSERT OR REPLACE INTO results (key, value, last_used) VALUES (?, ?, ?)', (key, json.dumps(value), time.time()))
+            self._count += not exists
+            if self._count > self.max_entries:
+                self._flush_touched()
+                self._count = self._db.execute('SELECT COUNT(*) FROM results').fetchone()[0]  # also picks up other processes' writes
+                excess = self._count - self.max_entries + self.evict_count
+                if self._count > self.max_entries:
+                    self._db.execute('DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_used LIMIT ?)', (excess,))
+                    self._count -= excess
+
+    def get_info(self, obj, *extra):
+        # Cached equivalent of get_info(obj)
+        key = expression_hash(obj, *extra)
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = get_info(obj)
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key=None):
+        # Drops one key (see expression_hash), or everything when no key is given
+        with self._lock, self._db:
+            if key is None:
+                self._db.execute('DELETE FROM results')
+                self._touched.clear()
+                self._count = 0
+            else:
+                self._count -= self._db.execute('DELETE FROM results WHERE key = ?', (key,)).rowcount
+                self._touched.pop(key, None)
+
+    def invalidate_expression(self, obj, *extra):
+        self.invalidate(expression_hash(obj, *extra))
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def flush(self):
+        # Writes pending last-used times now
+        with self._lock, self._db:
+            self._flush_touched()
+
+    def close(self):
+        self.flush()
+        self._db.close()
+
+# Map tile URL templates are valid for about as long as the Earth Engine token they were issued with (~1 hour), so they
+# are cached a little less than that. Keyed by expression_hash of the image and vis params, re-rendering the same image
+# and stretch reuses the same URL, and the browser its cached tiles
+map_id_cache = TTLCache(maxsize=256, ttl=55*60)
+
+def map_tile_url(image, vis_params=None, cache=map_id_cache):
+    # Tile URL template ('.../{z}/{x}/{y}') of image rendered with vis_params, e.g. for folium/geemap add_tile_layer
+    vis_params = vis_params or {}
+    def fetch():
+        initialize()
+        return instrumentation.call('getMapId', image, image.getMapId, vis_params)['tile_fetcher'].url_format
+    return cache.get_or_set(expression_hash(image, vis_params), fetch)
+
+# Deferred getThumbURL: nothing is requested until .url is read (e.g. when a download button is pressed), then the URL
+# is kept on the handle
+class ThumbnailURL:
+    def __init__(self, image, params):
+        self.image = image
+        self.params = params
+
+    @cached_property
+    def url(self):
+        initialize()
+        return instrumentation.call('getThumbURL', self.image, self.image.getThumbURL, self.params)
+
+    def __str__(self):
+        return self.url
+
+thumbnail_cache = TTLCache(maxsize=256, ttl=55*60)
+
+def thumbnail_url(image, vis_params=None, dims=2500, format='png', cache=thumbnail_cache):
+    # Lazy ThumbnailURL handle, memoized per image expression, vis params, dimensions and format
+    params = dict(vis_params or {}, dimensions=dims, format=format)
+    return cache.get_or_set(expression_hash(image, params), lambda: ThumbnailURL(image, params))
+
+def _call_counts(calls):
+    counts = {}
+    for call in calls:
+        counts[call['kind']] = counts.get(call['kind'], 0) + 1
+    return counts
+
+# Records every client-server call the toolbox makes (getInfo through get_info, getMapId through map_tile_url and
+# getThumbURL through ThumbnailURL): kind, call site, thread, latency, serialized expression size and node count.
+# Disabled by default (no overhead beyond a flag check); enable with instrumentation.enable() or the
+# RADGEETOOLBOX_INSTRUMENT environment variable. begin_request() collects the calls made in the calling context until
+# end_request(), e.g. one Streamlit rerun: its own thread plus the toolbox work it submits to worker threads, but not
+# other sessions' reruns or the warm-up scheduler
+_current_request = contextvars.ContextVar('radgeetoolbox_request', default=None)
+_STDLIB_DIR = os.path.dirname(os.__file__)
+
+class InstrumentedRequest:
+    def __init__(self, label):
+        self.label = label
+        self.started = time.time()
+        self.ended = None
+        self.calls = []
+
+    def counters(self):
+        return _call_counts(self.calls)
+
+class Instrumentation:
+    def __init__(self, enabled=False, max_calls=10000):
+        self.enabled = enabled
+        self.calls = deque(maxlen=max_calls)
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+
+    def begin_request(self, label='request'):
+        request = InstrumentedRequest(label)
+        request._previous = _current_request.get()
+        _current_request.set(request)
+        return request
+
+    def end_request(self, request):
+        # Stops collecting (also for worker threads still running on the request's behalf) and restores the request
+        # that was current before begin_request
+        request.ended = time.time()
+        if _current_request.get() is request:
+            _current_request.set(request._previous)
+        return request
+
+    @staticmethod
+    def _call_site():
+        # file:line function of the innermost caller outside this module and the standard library (e.g. the app line
+        # that led to the call). Calls with no such frame (worker threads) fall back to the innermost toolbox frame
+        # outside the call wrappers
+        frame = sys._getframe(2)
+        fallback = None
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if filename == __file__:
+                if fallback is None and frame.f_code.co_name not in ('get_info', 'fetch', 'url', 'get_or_set'):
+                    fallback = frame
+            elif not (filename.startswith(_STDLIB_DIR) and 'site-packages' not in filename or filename.startswith('<frozen')):
+                break
+            frame = frame.f_back
+        frame = frame or fallback
+        if frame is None:
+            return '<unknown>'
+        return f'{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}'
+
+    @staticmethod
+    def graph_stats(obj):
+        # (serialized size in bytes, number of function invocations) of an Earth Engine object's expression graph
+        encoded = ee.serializer.encode(obj)
+        nodes = 0
+        stack = [encoded]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, dict):
+                nodes += 'functionInvocationValue' in item
+                stack.extend(item.values())
+            elif isinstance(item, list):
+                stack.extend(item)
+        return len(json.dumps(encoded)), nodes
+
+    def call(self, kind, obj, fn, *args):
+        # Runs fn(*args), the client-server call of kind for obj, recording it when enabled
+        if not self.enabled:
+            return fn(*args)
+        site = self._call_site()
+        size, nodes = self.graph_stats(obj)
+        start = time.perf_counter()
+        error = None
+        try:
+            return fn(*args)
+        except Exception as e:
+            error = repr(e)
+            raise
+        finally:
+            call = {'kind': kind, 'site': site, 'thread': threading.current_thread().name, 'time': time.time(),
+                    'latency': time.perf_counter() - start, 'bytes': size, 'nodes': nodes, 'error': error}
+            request = _current_request.get()
+            with self._lock:
+                self.calls.append(call)
+                if request is not None and request.ended is None:
+                    request.calls.append(call)
+
+    def summary(self, calls=None):
+        # One row per (kind, call site): count, total/max latency, total bytes and nodes, most expensive first
+        rows = {}
+        for call in (self.calls if calls is None else calls):
+            row = rows.setdefault((call['kind'], call['site']), {'kind': call['kind'], 'site': call['site'], 'count': 0, 'total_latency': 0.0, 'max_latency': 0.0, 'bytes': 0, 'nodes': 0})
+            row['count'] += 1
+            row['total_latency'] += call['latency']
+            row['max_latency'] = max(row['max_latency'], call['latency'])
+            row['bytes'] += call['bytes']
+            row['nodes'] += call['nodes']
+        return sorted(rows.values(), key=lambda row: row['total_latency'], reverse=True)
+
+    def to_json(self, path=None, calls=None):
+        # Calls and their summary as JSON, written to path when given
+        with self._lock:
+            calls = list(self.calls if calls is None else calls)
+        data = json.dumps({'calls': calls, 'summary': self.summary(calls)}, indent=1)
+        if path:
+            with open(path, 'w') as f:
+                f.write(data)
+        return data
+
+    def debug_panel(self, request=None):
+        # Streamlit expander listing the calls of request (or all recorded calls), with a JSON download
+        import streamlit as st
+        import pandas as pd
+        calls = list(self.calls) if request is None else list(request.calls)
+        counts = ', '.join(f'{kind}: {count}' for kind, count in _call_counts(calls).items())
+        with st.expander(f'Earth Engine calls ({len(calls)}{" - " + counts if counts else ""})'):
+            st.dataframe(pd.DataFrame(self.summary(calls)))
+            st.dataframe(pd.DataFrame(calls))
+            st.download_button('Download call log (JSON)', self.to_json(calls=calls), file_name='ee_calls.json')
+
+instrumentation = Instrumentation(enabled=bool(os.environ.get('RADGEETOOLBOX_INSTRUMENT')))
@@ -0,0 +1,40 @@
+# Compares a serial dates sweep with the asyncio facade, against a mocked `ee` module whose getInfo simulates latency.
+# Usage: python benchmarks/bench_async.py [latency_seconds]
+import asyncio
+import os
+import sys
+import time
+from unittest import mock
+
+sys.modules['ee'] = mock.MagicMock()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from RadGEEToolbox_v1_0_2 import EEAsyncRunner, LandsatCollection, Sentinel2Collection
+
+LATENCY = float(sys.argv[1]) if len(sys.argv) > 1 else 0.2
+
+def sweep():
+    # Every WRS-2 path/row and MGRS tile covering Utah, one year each
+    cols = [LandsatCollection('2023-01-01', '2024-01-01', row, path, 100) for path in range(35, 40) for row in range(31, 35)]
+    cols += [Sentinel2Collection('2023-01-01', '2024-01-01', tile, 100, 30) for tile in ['12TVL', '12TVK', '12TTL', '12TTK', '12STH', '12STG', '12SXH', '12SXG', '12SVH', '12SVG', '12TWL', '12TWK']]
+    for col in cols:
+        col.dates_list.getInfo = lambda: time.sleep(LATENCY) or ['2023-01-01']
+    return cols
+
+async def run_async(cols, runner):
+    return await asyncio.gather(*(col.dates_async(runner) for col in cols))
+
+if __name__ == '__main__':
+    cols = sweep()
+    start = time.perf_counter()
+    for col in cols:
+        col.dates
+    print(f'serial:                      {time.perf_counter() - start:6.2f} s for {len(cols)} collections')
+
+    for concurrency, rate in [(8, None), (32, None), (32, 20)]:
+        cols = sweep()
+        runner = EEAsyncRunner(max_concurrency=concurrency, max_requests_per_second=rate)
+        start = time.perf_counter()
+        asyncio.run(run_async(cols, runner))
+        runner.shutdown()
+        print(f'async concurrency={concurrency:<3} rate={str(rate):<5} {time.perf_counter() - start:6.2f} s for {len(cols)} collections')
@@ -0,0 +1,71 @@
+# Exercises ChunkedTimeSeriesExecutor against a local stand-in for Earth Engine that fails ("Computation timed out.")
+# on any window longer than a configurable number of days, then simulates a crash and resumes from the checkpoints.
+# Usage: python benchmarks/bench_chunked.py [max_days_per_evaluation] [latency_seconds]
+import datetime
+import os
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+sys.modules['ee'] = mock.MagicMock()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from RadGEEToolbox_v1_0_2 import ChunkedTimeSeriesExecutor
+
+MAX_DAYS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+LATENCY = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+
+class StandIn:
+    # One 16-day revisit image per window day (two on every fifth revisit, like overlapping scenes), failing like EE
+    # does when the window is longer than max_days
+    def __init__(self, crash_after=None, max_days=MAX_DAYS, values=1):
+        self.calls = 0
+        self.values = values  # area columns per row, several for a list of bands
+        self.crash_after = crash_after
+        self.max_days = max_days
+        self.lock = threading.Lock()
+
+    def __call__(self, start, end):
+        with self.lock:
+            self.calls += 1
+            if self.crash_after is not None and self.calls > self.crash_after:
+                raise KeyboardInterrupt('simulated crash')
+        time.sleep(LATENCY)
+        start, end = datetime.date.fromisoformat(start), datetime.date.fromisoformat(end)
+        if self.max_days is not None and (end - start).days > self.max_days:
+            raise Exception('Computation timed out.')
+        day = start + datetime.timedelta(days=(-start.toordinal()) % 16)
+        rows = []
+        while day < end:
+            rows.append([day.isoformat()] + [float(day.toordinal() % (97 - i)) for i in range(self.values)])
+            if day.toordinal() // 16 % 5 == 0:
+                rows.append([day.isoformat()] + [float(day.toordinal() % (89 - i)) for i in range(self.values)])
+            day += datetime.timedelta(days=16)
+        return rows
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as checkpoint_dir:
+        full = StandIn()
+        started = time.perf_counter()
+        expected = ChunkedTimeSeriesExecutor(full, max_workers=8).run('1984-01-01', '2024-01-01', chunk_days=365 * 4)
+        print(f'no checkpoints: {len(expected)} images, {full.calls} evaluations, {time.perf_counter() - started:.2f} s')
+        assert expected == StandIn(max_days=None)('1984-01-01', '2024-01-01'), 'chunked rows differ from a single evaluation'
+
+        crashing = StandIn(crash_after=25)
+        try:
+            ChunkedTimeSeriesExecutor(crashing, checkpoint_dir=checkpoint_dir, max_workers=1).run('1984-01-01', '2024-01-01', chunk_days=365 * 4)
+        except KeyboardInterrupt:
+            print(f'crashed, {len(os.listdir(checkpoint_dir))} checkpoint files written')
+
+        resumed = StandIn()
+        rows = ChunkedTimeSeriesExecutor(resumed, checkpoint_dir=checkpoint_dir, max_workers=8).run('1984-01-01', '2024-01-01', chunk_days=365 * 4)
+        print(f'resumed: {len(rows)} images, {resumed.calls} evaluations, identical to uninterrupted run: {rows == expected}')
+        assert rows == expected, 'resumed rows differ from the uninterrupted run'
+        assert resumed.calls < full.calls, 'resuming re-evaluated windows that were checkpointed'
+
+        # Rows of several bands ([date, area, area, ...]) pass through whole
+        rows = ChunkedTimeSeriesExecutor(StandIn(values=3), max_workers=8).run('1984-01-01', '2024-01-01', chunk_days=365 * 4)
+        assert rows == StandIn(max_days=None, values=3)('1984-01-01', '2024-01-01'), 'multi-band rows differ from a single evaluation'
+        print(f'multi-band: {len(rows)} images of {len(rows[0]) - 1} bands')
@@ -0,0 +1,52 @@
+# Compares the previous filter-per-image CollectionStitch with the join-based stitch_by_date for year-long and
+# decade-long Landsat north/south collections: expression graph size and wall time to evaluate the stitched dates.
+# Runs offline against the fake Earth Engine backend (RadGEEToolbox_fake_ee) by default, where the wall time is the fake's
+# local evaluation; --live uses the real Earth Engine and needs credentials.
+# Usage: python benchmarks/bench_collection_stitch.py [--live]
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--live', action='store_true', help='evaluate against the real Earth Engine')
+args = parser.parse_args()
+if not args.live:
+    import RadGEEToolbox_fake_ee
+    RadGEEToolbox_fake_ee.install(catalog_start='2013-01-01', catalog_end='2023-01-01')
+
+import ee
+from RadGEEToolbox_v1_0_2 import LandsatCollection, get_info, stitch_by_date
+
+def filter_per_image_stitch(col1, col2):
+    # The CollectionStitch implementation that stitch_by_date replaced, kept here as the benchmark reference
+    filtered_col2 = col2.filter(ee.Filter.inList('Date_Filter', col1.aggregate_array('Date_Filter')))
+    filtered_col1 = col1.filter(ee.Filter.inList('Date_Filter', filtered_col2.aggregate_array('Date_Filter')))
+    def mosaic_images(img):
+        date = img.get('Date_Filter')
+        img2 = filtered_col2.filter(ee.Filter.equals('Date_Filter', date)).first()
+        mosaic = ee.ImageCollection.fromImages([img, img2]).mosaic()
+        return mosaic.copyProperties(img).set('Date_Filter', date).set('system:time_start', img.get('system:time_start'))
+    return filtered_col1.map(mosaic_images)
+
+def graph_size(obj):
+    encoded = ee.serializer.encode(obj)
+    return len(encoded.get('values', {})), len(json.dumps(encoded))
+
+def bench(label, stitch, start_date, end_date):
+    north = LandsatCollection(start_date, end_date, 31, 38, 100).collection
+    south = LandsatCollection(start_date, end_date, 32, 38, 100).collection
+    dates = stitch(north, south).aggregate_array('Date_Filter')
+    nodes, size = graph_size(dates)
+    start = time.perf_counter()
+    count = len(get_info(dates))
+    print(f'{label:<20} {start_date}..{end_date}  {count:4d} images  {nodes:4d} nodes  {size:6d} bytes  {time.perf_counter() - start:6.2f} s')
+
+if __name__ == '__main__':
+    LandsatCollection('2013-01-01', '2023-01-01', 31, 38, 100).dates  # generate the fake catalog (or warm up) outside the timings
+    for start_date, end_date in [('2022-01-01', '2023-01-01'), ('2013-01-01', '2023-01-01')]:
+        bench('filter per image', filter_per_image_stitch, start_date, end_date)
+        bench('join', stitch_by_date, start_date, end_date)
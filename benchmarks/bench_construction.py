@@ -0,0 +1,37 @@
+# Micro-benchmark of LandsatCollection/Sentinel2Collection construction time, run offline against a mocked `ee` module.
+# Usage: python benchmarks/bench_construction.py
+import os
+import sys
+import time
+from unittest import mock
+
+sys.modules['ee'] = mock.MagicMock()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import ee
+from RadGEEToolbox_v1_0_2 import LandsatCollection, Sentinel2Collection
+
+def bench(label, fn, repeat=2000):
+    ee.reset_mock()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    calls = len(ee.mock_calls)  # every ee call made while building the expression graph
+    print(f'{label:<45} {elapsed * 1e6:8.1f} us/iter   {calls / repeat:5.1f} ee calls/iter')
+
+def landsat_stitch():
+    north = LandsatCollection('2023-01-01', '2023-12-31', 31, 38, 100)
+    south = LandsatCollection('2023-01-01', '2023-12-31', 32, 38, 100)
+    return north.CollectionStitch(south)
+
+def landsat_all_derived():
+    col = LandsatCollection('2023-01-01', '2023-12-31', 31, 38, 100)
+    return col.ndwi, col.ndvi, col.halite, col.gypsum, col.LST, col.masked_clouds_collection
+
+if __name__ == '__main__':
+    bench('LandsatCollection()', lambda: LandsatCollection('2023-01-01', '2023-12-31', 31, 38, 100))
+    bench('Sentinel2Collection()', lambda: Sentinel2Collection('2023-01-01', '2023-12-31', '12TVL', 100, 30))
+    bench('LandsatCollection() + .ndwi', lambda: LandsatCollection('2023-01-01', '2023-12-31', 31, 38, 100).ndwi)
+    bench('LandsatCollection() + all derived collections', landsat_all_derived)
+    bench('LandsatCollection N/S + CollectionStitch', landsat_stitch)
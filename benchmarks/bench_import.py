@@ -0,0 +1,33 @@
+# Times importing the toolbox in a fresh interpreter, next to the cost of the geemap import (and the network-bound
+# geemap.ee_initialize() call) that used to happen at import time. Needs ee (and geemap for the comparison) installed.
+# Usage: python benchmarks/bench_import.py [repeat]
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+REPEAT = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+def time_import(statement):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', statement], cwd=ROOT, capture_output=True, text=True)
+        times.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1]
+    return statistics.median(times), None
+
+if __name__ == '__main__':
+    for label, statement in [('python startup', 'pass'),
+                             ('import ee', 'import ee'),
+                             ('import RadGEEToolbox_v1_0_2', 'import RadGEEToolbox_v1_0_2'),
+                             ('import geemap (previously done at import)', 'import geemap'),
+                             ('import geemap; geemap.ee_initialize()', 'import geemap; geemap.ee_initialize()')]:
+        median, error = time_import(statement)
+        if error:
+            print(f'{label:<45} failed: {error}')
+        else:
+            print(f'{label:<45} {median * 1000:8.1f} ms (median of {REPEAT})')
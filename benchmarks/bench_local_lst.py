@@ -0,0 +1,60 @@
+# Checks RadGEEToolbox_numpy.landsat_lst against a per-pixel evaluation of the landsat_LST expression, then times a
+# blocked run on memory-mapped scenes, one scene and several scenes in parallel processes.
+# Usage: python benchmarks/bench_local_lst.py [rows] [cols] [scenes]
+import math
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from RadGEEToolbox_numpy import LST_BANDS, LST_K1, LST_K2, landsat_lst, landsat_lst_scenes
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+COLS = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+SCENES = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+def reference(atran, emis, drad, trad, urad):
+    # temperature_bands scaling and the landsat_LST expression, one pixel at a time
+    transmittance, emissivity = atran * 0.0001, emis * 0.0001
+    downwelling, B10_rad, upwelling = drad * 0.001, trad * 0.001, urad * 0.001
+    k1, k2 = LST_K1, LST_K2
+    return (k2/math.log((k1/((B10_rad - upwelling - transmittance*(1 - emissivity)*downwelling)/(transmittance*emissivity)))+1)) - 273.15
+
+def synthetic_scene(rng, rows, cols):
+    # Raw ST_* values in typical ranges (e.g. ST_ATRAN 0.6-0.95, ST_EMIS 0.95-0.99, ST_TRAD 7-11 W/(m2 sr um))
+    return {'ST_ATRAN': rng.integers(6000, 9500, (rows, cols), dtype=np.uint16),
+            'ST_EMIS': rng.integers(9500, 9900, (rows, cols), dtype=np.uint16),
+            'ST_DRAD': rng.integers(500, 2500, (rows, cols), dtype=np.uint16),
+            'ST_TRAD': rng.integers(7000, 11000, (rows, cols), dtype=np.uint16),
+            'ST_URAD': rng.integers(300, 1500, (rows, cols), dtype=np.uint16)}
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+    bands = synthetic_scene(rng, 300, 200)
+    lst = landsat_lst(bands, block_rows=64)
+    worst = max(abs(lst[r, c] - reference(*(float(bands[name][r, c]) for name in LST_BANDS))) for r in range(0, 300, 7) for c in range(0, 200, 3))
+    assert worst < 1e-3, worst
+    print(f'parity with per-pixel landsat_LST expression: ok (max abs difference {worst:.2e} C)')
+
+    with tempfile.TemporaryDirectory() as workdir:
+        scenes = []
+        for i in range(SCENES):
+            scene = {'out': os.path.join(workdir, f'lst_{i}.npy')}
+            for name, array in synthetic_scene(rng, ROWS, COLS).items():
+                scene[name] = os.path.join(workdir, f'{name}_{i}.npy')
+                np.save(scene[name], array)
+            scenes.append(scene)
+
+        start = time.perf_counter()
+        landsat_lst_scenes(scenes[:1], max_workers=1)
+        single = time.perf_counter() - start
+        start = time.perf_counter()
+        landsat_lst_scenes(scenes)
+        parallel = time.perf_counter() - start
+        scratch_mb = 4 * 8 * 512 * COLS / 1e6
+        print(f'{ROWS}x{COLS} scene: {single:.2f} s for 1 scene, {parallel:.2f} s for {SCENES} scenes in parallel '
+              f'({scratch_mb:.0f} MB of scratch per scene at block_rows=512)')
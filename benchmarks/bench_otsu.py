@@ -0,0 +1,46 @@
+# Checks that the O(n) cumulative Otsu formulation picks the same threshold as the original per-bucket (O(n^2))
+# formulation of dNDWIPixelAreaSum on random 255-bucket histograms, and times both client-side.
+# Usage: python benchmarks/bench_otsu.py [histograms]
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from RadGEEToolbox_numpy import otsu_threshold
+
+COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+def iterative_otsu(counts, means):
+    # NumPy transcription of the original OtsuThreshold: slice and reduce the histogram for every split
+    total = counts.sum()
+    total_sum = (means * counts).sum()
+    mean = total_sum / total
+    bss = []
+    for i in range(1, len(means) + 1):
+        a_count = counts[:i].sum()
+        a_mean = (means[:i] * counts[:i]).sum() / a_count if a_count else 0.0
+        b_count = total - a_count
+        b_mean = (total_sum - a_count * a_mean) / b_count if b_count else 0.0
+        bss.append(a_count * (a_mean - mean) ** 2 + b_count * (b_mean - mean) ** 2)
+    return float(means[np.argsort(np.array(bss), kind='stable')[-1]])
+
+def random_histogram(rng):
+    # Bimodal water/land NDWI distribution with the 255 buckets of ee.Reducer.histogram(255, 2)
+    values = np.concatenate([rng.normal(-0.4, 0.15, rng.integers(1000, 50000)), rng.normal(0.3, 0.1, rng.integers(100, 50000))])
+    counts, edges = np.histogram(np.clip(values, -1, 1), bins=255, range=(-1, 1))
+    return {'histogram': counts.tolist(), 'bucketMeans': ((edges[:-1] + edges[1:]) / 2).tolist()}
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+    histograms = [random_histogram(rng) for _ in range(COUNT)]
+    start = time.perf_counter()
+    cumulative = [otsu_threshold(h) for h in histograms]
+    cumulative_time = time.perf_counter() - start
+    start = time.perf_counter()
+    iterative = [iterative_otsu(np.array(h['histogram'], float), np.array(h['bucketMeans'])) for h in histograms]
+    iterative_time = time.perf_counter() - start
+    assert np.allclose(cumulative, iterative), [(c, i) for c, i in zip(cumulative, iterative) if not np.isclose(c, i)]
+    print(f'{COUNT} histograms: same thresholds; cumulative {cumulative_time / COUNT * 1e6:.0f} us, iterative {iterative_time / COUNT * 1e6:.0f} us per histogram')
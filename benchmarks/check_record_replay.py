@@ -0,0 +1,59 @@
+# Records a session against the fake Earth Engine backend with instrumentation enabled, then replays the recording
+# with the calls made in a different order (with and without instrumentation) and checks every result matches. Replay
+# looks results up by call site and per-site ordinal, so calls from different sites may come in any order (calls from
+# the same site, here the two dates lists, keep theirs); this fails if the toolbox's call wrappers leak into the
+# recorded call sites and collapse them into one. Exits with an assertion error on mismatch.
+# Usage: python benchmarks/check_record_replay.py
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import RadGEEToolbox_fake_ee as fake
+
+backend = fake.install()
+
+import RadGEEToolbox_v1_0_2 as toolbox
+from RadGEEToolbox_v1_0_2 import LandsatCollection, Sentinel2Collection
+
+VIS = {'bands': ['SR_B4', 'SR_B3', 'SR_B2'], 'min': 0, 'max': 24000}
+
+def session(order):
+    # The same calls as an app rerun (dates, metadata, map tiles, thumbnail) plus a Sentinel-2 date list, in the given order
+    toolbox.collection_cache.invalidate()
+    toolbox.map_id_cache.invalidate()
+    toolbox.thumbnail_cache.invalidate()
+    landsat = LandsatCollection('2023-01-01', '2023-12-31', 31, 38, 100)
+    sentinel = Sentinel2Collection('2023-01-01', '2023-03-31', '12TVL', 100, 30)
+    steps = {
+        'dates': lambda: landsat.dates,
+        'metadata': lambda: landsat.collection_metadata(),
+        'map': lambda: toolbox.map_tile_url(landsat.image_grab(0), VIS),
+        'thumbnail': lambda: toolbox.thumbnail_url(landsat.image_grab(0), VIS, 2500).url,
+        'sentinel_dates': lambda: sentinel.dates,
+    }
+    return {name: steps[name]() for name in order}
+
+if __name__ == '__main__':
+    order = ['dates', 'metadata', 'map', 'thumbnail', 'sentinel_dates']
+    replay_order = ['thumbnail', 'map', 'dates', 'sentinel_dates', 'metadata']
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'session.json')
+        toolbox.instrumentation.enable()
+        backend.configure(mode='record', recording=path)
+        backend.reset()
+        recorded = session(order)
+        backend.recording.save()
+        print(f'recorded {len(backend.recording.entries)} calls: {sorted(backend.recording.entries)}')
+
+        for instrumented in (True, False):
+            if instrumented:
+                toolbox.instrumentation.enable()
+            else:
+                toolbox.instrumentation.disable()
+            backend.configure(mode='replay', recording=path)
+            backend.reset()
+            replayed = session(replay_order)
+            assert replayed == recorded, f'replay (instrumentation {"on" if instrumented else "off"}) differs from the recording'
+            print(f'replayed in a different order with instrumentation {"on" if instrumented else "off"}: identical')
@@ -0,0 +1,217 @@
+# Benchmark suite for the toolbox's hot paths, run offline against the fake Earth Engine backend
+# (RadGEEToolbox_fake_ee). For every benchmark it reports the best wall time, the number of remote calls
+# (getInfo/getMapId/getThumbURL) and the expression graph node count, and compares them with benchmarks/baselines.json.
+# Remote calls and node counts are deterministic, so any increase is a regression; wall time regresses when it exceeds
+# the baseline by more than --threshold (and by at least 5 ms) at the same --latency. Wall times include the fake
+# backend's local evaluation and depend on the machine, so refresh the baselines with --update when moving to a new
+# one. Exits with status 1 on regressions.
+# Usage: python benchmarks/run_benchmarks.py [--update] [--threshold 1.0] [--latency 0.0] [--repeat 5] [--only name ...]
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import RadGEEToolbox_fake_ee as fake
+
+backend = fake.install()
+
+import ee
+import RadGEEToolbox_v1_0_2 as toolbox
+from RadGEEToolbox_v1_0_2 import LandsatCollection, Sentinel2Collection
+from RadGEEToolbox_regions import default_registry
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+START, END = '2023-01-01', '2023-12-31'
+PATH, ROWS = 38, [31, 32, 33, 34]
+TILES = ['12TVL', '12TVK']
+GEOMETRY = ee.Feature(ee.Geometry.Rectangle([-112.3, 40.6, -112.0, 40.9]))
+
+def clear_caches():
+    for cache in (toolbox.collection_cache, toolbox.map_id_cache, toolbox.thumbnail_cache):
+        cache.invalidate()
+
+def landsat(row):
+    return LandsatCollection(START, END, row, PATH, 100)
+
+def landsat_construction():
+    return landsat(ROWS[0]).collection
+
+def sentinel2_construction():
+    return Sentinel2Collection(START, END, TILES[0], 100, 30).collection
+
+def landsat_stitch_2_tiles():
+    stitched = landsat(ROWS[0]).CollectionStitch(landsat(ROWS[1]))
+    stitched.dates
+    return stitched.collection
+
+def sentinel2_stitch_2_tiles():
+    stitched = Sentinel2Collection(START, END, TILES[0], 100, 30).CollectionStitch(Sentinel2Collection(START, END, TILES[1], 100, 30))
+    stitched.dates
+    return stitched.collection
+
+def landsat_stitch_4_tiles_chained():
+    stitched = landsat(ROWS[0])
+    for row in ROWS[1:]:
+        stitched = stitched.CollectionStitch(landsat(row))
+    stitched.dates
+    return stitched.collection
+
+def landsat_mosaic_by_date_4_tiles():
+    mosaic = LandsatCollection.mosaic_by_date(START, END, [(PATH, row) for row in ROWS], 100)
+    mosaic.dates
+    return mosaic.collection
+
+def legacy_collection_stitch():
+    collection = toolbox.CollectionStitch(landsat(ROWS[0]), landsat(ROWS[1]))
+    LandsatCollection(collection=collection).dates
+    return collection
+
+def pixel_area_sum_graph():
+    image = landsat(ROWS[0]).ndwi.image_grab(0)
+    return LandsatCollection.PixelAreaSum(image, 'ndwi', GEOMETRY)
+
+def dndwi_pixel_area_sum_graph():
+    image = landsat(ROWS[0]).ndwi.image_grab(0)
+    return LandsatCollection.dNDWIPixelAreaSum(image, GEOMETRY)
+
+def index_mapping():
+    collection = landsat(ROWS[0])
+    return [collection.ndwi.collection, collection.ndvi.collection, collection.halite.collection, collection.gypsum.collection, collection.LST.collection]
+
+def indices_collection():
+    return landsat(ROWS[0]).indices_collection(['ndwi', 'ndvi', 'halite', 'gypsum', 'LST']).collection
+
+def area_time_series_4_indices():
+    # One stacked reduceRegion per image, compare with 4x area_time_series
+    collection = landsat(ROWS[0]).indices_collection(['ndwi', 'ndvi', 'halite', 'gypsum'])
+    rows = collection.area_time_series_rows(['ndwi', 'ndvi', 'halite', 'gypsum'], GEOMETRY)
+    toolbox.area_series(toolbox.get_info(rows), ['ndwi', 'ndvi', 'halite', 'gypsum'])
+    return rows
+
+def area_time_series():
+    rows = landsat(ROWS[0]).ndwi.area_time_series_rows('ndwi', GEOMETRY)
+    toolbox.area_series(toolbox.get_info(rows), 'ndwi')
+    return rows
+
+def area_time_series_dynamic():
+    ndwi = landsat(ROWS[0]).ndwi
+    ndwi.area_time_series('ndwi', GEOMETRY, dynamic_threshold=True)
+    return ndwi.area_time_series_rows('ndwi', GEOMETRY, dynamic_threshold=True, thresholds=ndwi.otsu_thresholds(GEOMETRY))
+
+def app_rerun(dataset, clear=True):
+    # What utah_streamlit_v1_2.py does on a rerun, minus Streamlit and the map widget
+    if clear:
+        clear_caches()
+    region = default_registry().get('Salt Lake Valley')
+    if dataset == 'landsat':
+        collection = toolbox.cached_landsat_stitch(START, END, region['row_N'], region['row_S'], region['path'], 100, False)
+        img_date = sorted(collection.dates)[-1]
+        image = collection.LST.image_pick(img_date)
+        vis = {'bands': ['LST'], 'min': 0, 'max': 50, 'palette': ['042333', 'e8fa5b']}
+        collection.metadata_for_date(img_date)['SPACECRAFT_ID']
+    else:
+        collection = toolbox.cached_sentinel2_stitch(START, END, region['tile_N'], region['tile_S'], 100, 30, False)
+        img_date = sorted(collection.dates)[-1]
+        image = collection.image_pick(img_date)
+        vis = {'bands': ['B4', 'B3', 'B2'], 'min': 0, 'max': 4000}
+    toolbox.map_tile_url(image, vis)
+    toolbox.thumbnail_url(image, vis, 2500)  # handle only, the URL is fetched on download
+    return image
+
+BENCHMARKS = {
+    'landsat_construction': landsat_construction,
+    'sentinel2_construction': sentinel2_construction,
+    'landsat_stitch_2_tiles': landsat_stitch_2_tiles,
+    'sentinel2_stitch_2_tiles': sentinel2_stitch_2_tiles,
+    'landsat_stitch_4_tiles_chained': landsat_stitch_4_tiles_chained,
+    'landsat_mosaic_by_date_4_tiles': landsat_mosaic_by_date_4_tiles,
+    'legacy_collection_stitch': legacy_collection_stitch,
+    'pixel_area_sum_graph': pixel_area_sum_graph,
+    'dndwi_pixel_area_sum_graph': dndwi_pixel_area_sum_graph,
+    'index_mapping': index_mapping,
+    'indices_collection': indices_collection,
+    'area_time_series': area_time_series,
+    'area_time_series_4_indices': area_time_series_4_indices,
+    'area_time_series_dynamic': area_time_series_dynamic,
+    'app_rerun_landsat_cold': lambda: app_rerun('landsat'),
+    'app_rerun_landsat_warm': lambda: app_rerun('landsat', clear=False),
+    'app_rerun_sentinel2_cold': lambda: app_rerun('sentinel2'),
+}
+
+def measure(fn, repeat, latency):
+    best = None
+    for _ in range(repeat):
+        backend.reset()
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    nodes = sum(fake.graph_size(obj) for obj in (result if isinstance(result, list) else [result]))
+    return {'wall_time': best, 'remote_calls': len(backend.calls), 'nodes': nodes, 'latency': latency}
+
+def regressions(result, baseline, threshold):
+    found = []
+    if 'error' in result or 'error' in baseline:
+        if result.get('error') and not baseline.get('error'):
+            found.append(f'now fails: {result["error"]}')
+        return found
+    for metric in ('remote_calls', 'nodes'):
+        if result[metric] > baseline[metric]:
+            found.append(f'{metric} {baseline[metric]} -> {result[metric]}')
+    if result['latency'] != baseline.get('latency', 0.0):
+        return found  # wall times are only comparable at the same simulated latency
+    if result['wall_time'] > baseline['wall_time'] * (1 + threshold) and result['wall_time'] - baseline['wall_time'] > 5e-3:
+        found.append(f'wall_time {baseline["wall_time"] * 1e3:.2f} ms -> {result["wall_time"] * 1e3:.2f} ms')
+    return found
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--update', action='store_true', help='write the results as the new baselines')
+    parser.add_argument('--threshold', type=float, default=1.0, help='allowed relative wall time increase')
+    parser.add_argument('--latency', type=float, default=0.0, help='simulated seconds per remote call')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', nargs='*', help='benchmark names to run')
+    args = parser.parse_args()
+    backend.configure(latency=args.latency)
+
+    baselines = {}
+    if os.path.exists(BASELINES_PATH):
+        with open(BASELINES_PATH) as f:
+            baselines = json.load(f)
+
+    landsat(ROWS[0]).dates  # generate the synthetic catalog outside the timings
+    Sentinel2Collection(START, END, TILES[0], 100, 30).dates
+
+    results, failed = {}, False
+    print(f'{"benchmark":<34} {"wall ms":>9} {"calls":>6} {"nodes":>6}   vs baseline')
+    for name, fn in BENCHMARKS.items():
+        if args.only and name not in args.only:
+            continue
+        try:
+            result = measure(fn, args.repeat, args.latency)
+        except Exception as e:
+            result = {'error': f'{type(e).__name__}: {e}'}
+        results[name] = result
+        found = regressions(result, baselines[name], args.threshold) if name in baselines else []
+        failed = failed or bool(found)
+        if 'error' in result:
+            line = f'{name:<34} {"error":>9} {"-":>6} {"-":>6}   {result["error"]}'
+        else:
+            line = f'{name:<34} {result["wall_time"] * 1e3:9.2f} {result["remote_calls"]:6d} {result["nodes"]:6d}'
+            if name in baselines and 'error' not in baselines[name]:
+                line += f'   {baselines[name]["wall_time"] * 1e3:.2f} ms / {baselines[name]["remote_calls"]} / {baselines[name]["nodes"]}'
+        print(line + ''.join(f'\n    REGRESSION {item}' for item in found))
+
+    if args.update:
+        baselines.update(results)
+        with open(BASELINES_PATH, 'w') as f:
+            json.dump(baselines, f, indent=1, sort_keys=True)
+        print(f'baselines written to {BASELINES_PATH}')
+    sys.exit(1 if failed and not args.update else 0)
+
+if __name__ == '__main__':
+    main()